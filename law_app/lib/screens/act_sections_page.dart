@@ -1,12 +1,54 @@
 import 'package:flutter/material.dart';
+import 'package:http/http.dart' as http;
+import 'dart:convert';
 import 'section_detail_page.dart';
 
-class ActSectionsPage extends StatelessWidget {
+class ActSectionsPage extends StatefulWidget {
+  final String actId;
   final String actName;
-  final List sections;
   final String? description; // ✅ Add this line
 
-  const ActSectionsPage({super.key, required this.actName, required this.sections,this.description,});
+  const ActSectionsPage({super.key, required this.actId, required this.actName, this.description,});
+
+  @override
+  State<ActSectionsPage> createState() => _ActSectionsPageState();
+}
+
+class _ActSectionsPageState extends State<ActSectionsPage> {
+  static const String baseUrl = "https://law-and-order-app.onrender.com";
+
+  // Table of contents only: section numbers and titles, bodies are loaded on tap
+  List<dynamic> sections = [];
+  bool isLoading = true;
+
+  @override
+  void initState() {
+    super.initState();
+    fetchSections();
+  }
+
+  Future<void> fetchSections() async {
+    try {
+      final response = await http.get(
+        Uri.parse("$baseUrl/acts/${widget.actId}/sections"),
+        headers: {'Accept': 'application/json'},
+      ).timeout(const Duration(seconds: 30));
+
+      if (response.statusCode == 200) {
+        final data = json.decode(response.body);
+        sections = data['sections'] ?? [];
+        print("✅ Loaded ${sections.length} sections of act ${widget.actId}");
+      } else {
+        print("❌ Sections request failed: ${response.statusCode}");
+      }
+    } catch (e) {
+      print("❌ Error loading sections: $e");
+    }
+
+    if (mounted) {
+      setState(() => isLoading = false);
+    }
+  }
 
 @override
 Widget build(BuildContext context) {
@@ -14,9 +56,11 @@ Widget build(BuildContext context) {
     backgroundColor: const Color(0xFF0A0E21),
     appBar: AppBar(
       backgroundColor: const Color(0xFF0A0E21),
-      title: Text(actName, style: const TextStyle(color: Colors.white)),
+      title: Text(widget.actName, style: const TextStyle(color: Colors.white)),
     ),
-    body: sections.isEmpty
+    body: isLoading
+        ? const Center(child: CircularProgressIndicator(color: Colors.cyanAccent))
+        : sections.isEmpty
         ? Padding(
             padding: const EdgeInsets.all(16.0),
             child: Card(
@@ -25,7 +69,7 @@ Widget build(BuildContext context) {
               child: Padding(
                 padding: const EdgeInsets.all(16.0),
                 child: Text(
-                  description ?? "No details available for this Act.",
+                  widget.description ?? "No details available for this Act.",
                   style: const TextStyle(color: Colors.white70, fontSize: 16),
                 ),
               ),
@@ -35,28 +79,35 @@ Widget build(BuildContext context) {
             itemCount: sections.length,
             itemBuilder: (context, index) {
               final section = sections[index];
+              final isSection = section['kind'] == 'section';
+              final chapter = section['chapter'] ?? '';
               return Card(
                 color: const Color(0xFF1D1E33),
                 shape: RoundedRectangleBorder(borderRadius: BorderRadius.circular(16)),
                 margin: const EdgeInsets.symmetric(horizontal: 12, vertical: 6),
                 child: ListTile(
                   title: Text(
-                    "Sec ${section['section_number']} - ${section['title']}",
+                    isSection
+                        ? "Sec ${section['section_number']} - ${section['title']}"
+                        : "${section['title'] ?? section['section_number']}",
                     style: const TextStyle(
                         color: Colors.cyanAccent, fontWeight: FontWeight.bold),
                   ),
-                  subtitle: Text(
-                    section['content'],
-                    maxLines: 2,
-                    overflow: TextOverflow.ellipsis,
-                    style: const TextStyle(color: Colors.white70),
-                  ),
+                  subtitle: isSection && chapter.isEmpty
+                      ? null
+                      : Text(
+                          isSection ? chapter : "${section['parts']} part(s)",
+                          maxLines: 2,
+                          overflow: TextOverflow.ellipsis,
+                          style: const TextStyle(color: Colors.white70),
+                        ),
                   onTap: () {
                     Navigator.push(
                       context,
                       MaterialPageRoute(
                         builder: (_) => SectionDetailPage(
-                          actName: actName,
+                          actId: widget.actId,
+                          actName: widget.actName,
                           section: section,
                         ),
                       ),
@@ -70,4 +121,3 @@ Widget build(BuildContext context) {
 }
 
 }
-
@@ -952,7 +952,7 @@ Widget _buildPoliceStationDropdown() {
           'description': _incidentDescriptionController.text,
           'property_details': _propertyDetailsController.text,
           'accused_details': _accusedDetailsController.text,
-          'created_at': DateTime.now().toIso8601String(),
+          'created_at': DateTime.now().toUtc().toIso8601String(),
           'status': 'PDF Generated',
         };
 
@@ -1034,7 +1034,7 @@ Widget _buildPoliceStationDropdown() {
                 _buildPdfRow('District', firData['district_name']),
                 _buildPdfRow('Police Station', firData['police_station_name']),
                 _buildPdfRow('FIR No.', '_____________ (To be filled by Police)'),
-                _buildPdfRow('Date', DateTime.parse(firData['created_at']).toString().split(' ')[0]),
+                _buildPdfRow('Date', DateTime.parse(firData['created_at']).toLocal().toString().split(' ')[0]),
                 _buildPdfRow('Time', firData['incident_time']),
               ],
             ),
@@ -68,25 +68,8 @@ class _LibraryScreenState extends State<LibraryScreen> with TickerProviderStateM
       final actName = (act['act_name'] ?? '').toString().toLowerCase();
       final description = (act['description'] ?? '').toString().toLowerCase();
       
-      // Search in act name and description
-      bool matchesAct = actName.contains(searchQuery) || description.contains(searchQuery);
-      
-      // Search in sections
-      bool matchesSection = false;
-      if (act['sections'] != null) {
-        final sections = act['sections'] as List;
-        matchesSection = sections.any((section) {
-          final sectionTitle = (section['title'] ?? '').toString().toLowerCase();
-          final sectionContent = (section['content'] ?? '').toString().toLowerCase();
-          final sectionNumber = (section['section_number'] ?? '').toString().toLowerCase();
-          
-          return sectionTitle.contains(searchQuery) || 
-                 sectionContent.contains(searchQuery) ||
-                 sectionNumber.contains(searchQuery);
-        });
-      }
-      
-      return matchesAct || matchesSection;
+      // Acts are listed by header only; sections are loaded when an act is opened
+      return actName.contains(searchQuery) || description.contains(searchQuery);
     }).toList();
 
     // Search in Articles
@@ -313,42 +296,6 @@ Future<http.Response> _fetchWithRetry(String url, String dataType) async {
   throw Exception('All retry attempts failed for $dataType');
 }
 
-  void showSections(Map<String, dynamic> act) {
-    final List sections = act['sections'] ?? [];
-
-    showDialog(
-      context: context,
-      builder: (_) => AlertDialog(
-        backgroundColor: const Color(0xFF1D1E33),
-        title: Text(
-          act['act_name'],
-          style: const TextStyle(color: Colors.white, fontWeight: FontWeight.bold),
-        ),
-        content: SizedBox(
-          width: double.maxFinite,
-          child: ListView.separated(
-            shrinkWrap: true,
-            itemCount: sections.length,
-            separatorBuilder: (_, __) => const Divider(color: Colors.grey),
-            itemBuilder: (context, index) {
-              final section = sections[index];
-              return ListTile(
-                title: Text(
-                  "Sec ${section['section_number']} - ${section['title']}",
-                  style: const TextStyle(color: Colors.lightBlueAccent),
-                ),
-                subtitle: Text(
-                  section['content'],
-                  style: const TextStyle(color: Colors.white),
-                ),
-              );
-            },
-          ),
-        ),
-      ),
-    );
-  }
-
   Widget buildCard(String title, String subtitle, {VoidCallback? onTap}) {
     return Card(
       margin: const EdgeInsets.symmetric(horizontal: 12, vertical: 6),
@@ -383,7 +330,7 @@ Future<http.Response> _fetchWithRetry(String url, String dataType) async {
         controller: _searchController,
         style: const TextStyle(color: Colors.white),
         decoration: InputDecoration(
-          hintText: 'Search acts, articles, cases, sections...',
+          hintText: 'Search acts, articles, cases...',
           hintStyle: TextStyle(color: Colors.grey[400]),
           prefixIcon: const Icon(Icons.search, color: Colors.cyanAccent),
           suffixIcon: isSearching
@@ -435,8 +382,8 @@ Future<http.Response> _fetchWithRetry(String url, String dataType) async {
                 context,
                 MaterialPageRoute(
                   builder: (_) => ActSectionsPage(
+                    actId: act['act_id'],
                     actName: act['act_name'],
-                    sections: act['sections'],
                     description: act['description'],
                   ),
                 ),
@@ -544,8 +491,8 @@ Future<http.Response> _fetchWithRetry(String url, String dataType) async {
                                     context,
                                     MaterialPageRoute(
                                       builder: (_) => ActSectionsPage(
+                                        actId: act['act_id'],
                                         actName: act['act_name'],
-                                        sections: act['sections'],
                                         description: act['description'],
                                       ),
                                     ),
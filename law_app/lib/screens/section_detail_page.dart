@@ -1,24 +1,77 @@
 import 'package:flutter/material.dart';
+import 'package:http/http.dart' as http;
+import 'dart:convert';
 
-class SectionDetailPage extends StatelessWidget {
+class SectionDetailPage extends StatefulWidget {
+  final String actId;
   final String actName;
-  final Map<String, dynamic> section;
+  final Map<String, dynamic> section; // table-of-contents entry, without the body
 
   const SectionDetailPage({
     super.key,
+    required this.actId,
     required this.actName,
     required this.section,
   });
 
+  @override
+  State<SectionDetailPage> createState() => _SectionDetailPageState();
+}
+
+class _SectionDetailPageState extends State<SectionDetailPage> {
+  static const String baseUrl = "https://law-and-order-app.onrender.com";
+
+  String? content;
+  bool isLoading = true;
+
+  @override
+  void initState() {
+    super.initState();
+    fetchContent();
+  }
+
+  Future<Map<String, dynamic>> _fetchPart(int part) async {
+    final number = Uri.encodeComponent("${widget.section['section_number']}");
+    final response = await http.get(
+      Uri.parse("$baseUrl/acts/${widget.actId}/sections/$number?part=$part"),
+      headers: {'Accept': 'application/json'},
+    ).timeout(const Duration(seconds: 30));
+
+    if (response.statusCode != 200) {
+      throw Exception('Section request failed: ${response.statusCode}');
+    }
+    return json.decode(response.body);
+  }
+
+  Future<void> fetchContent() async {
+    try {
+      // Schedules are stored in parts; fetch them one by one and join them
+      final first = await _fetchPart(0);
+      final parts = [first['content'] ?? ''];
+      final int count = first['parts'] ?? 1;
+      for (int part = 1; part < count; part++) {
+        parts.add((await _fetchPart(part))['content'] ?? '');
+      }
+      content = parts.join("\n");
+    } catch (e) {
+      print("❌ Error loading section: $e");
+      content = "Failed to load this section. Please try again.";
+    }
+
+    if (mounted) {
+      setState(() => isLoading = false);
+    }
+  }
 
 @override
 Widget build(BuildContext context) {
+  final section = widget.section;
   return Scaffold(
     backgroundColor: const Color(0xFF0A0E21),
     appBar: AppBar(
       backgroundColor: const Color(0xFF0A0E21),
       title: Text(
-        "$actName - Sec ${section['section_number']}",
+        "${widget.actName} - Sec ${section['section_number']}",
         style: const TextStyle(color: Colors.white),
       ),
     ),
@@ -41,10 +94,12 @@ Widget build(BuildContext context) {
                 ),
               ),
               const SizedBox(height: 12),
-              Text(
-                section['content'],
-                style: const TextStyle(color: Colors.white70, fontSize: 16),
-              ),
+              isLoading
+                  ? const Center(child: CircularProgressIndicator(color: Colors.cyanAccent))
+                  : Text(
+                      content ?? '',
+                      style: const TextStyle(color: Colors.white70, fontSize: 16),
+                    ),
             ],
           ),
         ),
@@ -54,5 +109,3 @@ Widget build(BuildContext context) {
 }
 
 }
-
-
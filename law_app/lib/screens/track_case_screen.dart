@@ -149,7 +149,7 @@ class _TrackCaseScreenState extends State<TrackCaseScreen> {
           _buildDetailRow('District', _firDetails!['district_name'] ?? 'N/A'),
           _buildDetailRow('Police Station', _firDetails!['police_station_name'] ?? 'N/A'),
           _buildDetailRow('Category', _firDetails!['category']),
-          _buildDetailRow('Created Date', DateTime.parse(_firDetails!['created_at']).toString().split(' ')[0]),
+          _buildDetailRow('Created Date', DateTime.parse(_firDetails!['created_at']).toLocal().toString().split(' ')[0]),
           
           SizedBox(height: 20),
           
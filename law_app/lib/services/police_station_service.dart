@@ -32,6 +32,30 @@ class PoliceStationService {
     }
   }
 
+  /// Get nearby police stations for several locations (e.g. a route or saved
+  /// addresses) in one request. Each result has latitude, longitude, district,
+  /// state and its own list of stations, in the same order as [points].
+  static Future<List<Map<String, dynamic>>> getNearbyPoliceStationsBatch(
+      List<Map<String, double>> points) async {
+    try {
+      final response = await http.post(
+        Uri.parse("$baseUrl/api/locations/police-stations-nearby/batch"),
+        headers: {"Content-Type": "application/json"},
+        body: jsonEncode({"points": points}),
+      ).timeout(Duration(seconds: 30));
+
+      if (response.statusCode == 200) {
+        List<dynamic> data = jsonDecode(response.body);
+        return data.cast<Map<String, dynamic>>();
+      } else {
+        throw Exception("Failed to load police stations: ${response.statusCode}");
+      }
+    } catch (e) {
+      print("Error fetching nearby police stations batch: $e");
+      return [];
+    }
+  }
+
   /// Get current location with proper error handling
   static Future<Position> _getCurrentLocation() async {
     // Check if location services are enabled
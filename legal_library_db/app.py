@@ -1,21 +1,22 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
-import requests
 import logging
 import os
-import json
 import re
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from math import radians, cos, sin, asin, sqrt
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable  
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from search_index import search_sections
+from pagination import MAX_PAGE_SIZE, find_page
+from mailer import SMTPOutbox
+from fir_store import (
+    CONFLICT, CREATED, LIST_KEY, MAX_BATCH_RECORDS, ensure_fir_indexes, ensure_stats_indexes, fir_json, list_filters,
+    stats_pipeline, upsert_firs, validate_fir,
+)
+from upstream import run_by_deadline
+from geo import geohash_encode
 
 # ──────────────────────────────────────────────────────────────────────────────── 
 # ENV / LOGGING
@@ -31,25 +32,30 @@ logger = logging.getLogger(__name__)
 # ──────────────────────────────────────────────────────────────────────────────── 
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Next-Cursor", "X-Partial-Results", "X-Computed-At"])
 
 # ──────────────────────────────────────────────────────────────────────────────── 
-# MONGODB CONNECTION
+# MONGODB CONNECTION + UPSTREAM CLIENTS
 # ──────────────────────────────────────────────────────────────────────────────── 
 
-mongo_uri = os.getenv("MONGO_URI")
-client, db = None, None
-
-if mongo_uri:
-    try:
-        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5_000)
-        client.admin.command("ping")
-        db = client["legal_library"]
-        logger.info("✅ MongoDB connected")
-    except Exception as e:
-        logger.error(f"❌ MongoDB connection failed: {e}")
-else:
-    logger.warning("⚠️ MONGO_URI missing in .env")
+# The connection, geocoding caches and upstream clients live in plain modules so
+# scripts such as warm_district_stations.py can use them without booting the app
+from database import db
+from stations import (
+    REVERSE_GEOHASH_PRECISION, fallback_police_stations, forward_geocode_cache, get_area_from_coordinates,
+    nominatim_breaker, nominatim_limiter, nominatim_timer, overpass_breaker, overpass_limiter, overpass_poster,
+    overpass_tile_cache, overpass_timer, refresh_district_stations, reverse_geocode_cache,
+    search_nearby_police_stations, search_nearby_police_stations_batch, unnamed_station_name,
+)
+
+# Upstream lookups for one request run side by side on this shared pool under
+# the request's deadline: lookups still queued when it passes are cancelled, and
+# running ones have their upstream timeouts cut to the time that was left
+NEARBY_DEADLINE_SECONDS = float(os.getenv("NEARBY_DEADLINE_SECONDS", 8))
+MAX_BATCH_POINTS = 50
+upstream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("UPSTREAM_WORKERS", 16)), thread_name_prefix="upstream"
+)
 
 # ──────────────────────────────────────────────────────────────────────────────── 
 # FIREBASE ADMIN INITIALISATION
@@ -94,34 +100,23 @@ def is_strong_password(password):
         return False, "Password must contain at least one number"
     return True, "Password is strong"
 
+# Auth emails go through a Mongo-backed outbox; a background worker sends them
+# over one reused SMTP session. SMTP_HOST/SMTP_PORT/SMTP_STARTTLS allow pointing
+# it at a local stand-in server.
+email_outbox = SMTPOutbox(
+    db.email_outbox if db is not None else None,
+    host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+    port=int(os.getenv("SMTP_PORT", 587)),
+    username=os.getenv('SMTP_EMAIL'),
+    password=os.getenv('SMTP_PASSWORD'),
+    starttls=os.getenv("SMTP_STARTTLS", "true").lower() != "false",
+)
+email_outbox.start()
+
 def send_email_smtp(to_email, subject, html_content):
-    """Send email using SMTP (Gmail) with proper UTF-8 encoding"""
+    """Queue an email in the outbox; returns False if it could not be queued"""
     try:
-        smtp_server = "smtp.gmail.com"
-        smtp_port = 587
-        sender_email = os.getenv('SMTP_EMAIL')
-        sender_password = os.getenv('SMTP_PASSWORD')
-        
-        if not sender_email or not sender_password:
-            logger.error("SMTP credentials not configured")
-            return False
-
-        message = MIMEMultipart("alternative")
-        message["Subject"] = subject
-        message["From"] = sender_email
-        message["To"] = to_email
-
-        html_part = MIMEText(html_content, "html", "utf-8")
-        message.attach(html_part)
-
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, to_email, message.as_string().encode('utf-8'))
-        server.quit()
-        
-        logger.info(f"Email sent successfully to {to_email}")
-        return True
+        return email_outbox.enqueue(to_email, subject, html_content)
     except Exception as e:
         logger.error(f"SMTP email failed: {e}")
         return False
@@ -147,6 +142,15 @@ def send_password_reset_email(email, name, reset_link):
     """
     return send_email_smtp(email, "Reset Your LexAid Password", html_content)
 
+def page_response(docs, next_cursor):
+    response = jsonify(docs)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def paginated_find(collection, key, args):
+    return page_response(*find_page(collection, key, args))
+
 def validate_db_connection():
     if db is None:
         return False, "Database not connected"
@@ -156,112 +160,6 @@ def validate_db_connection():
     except Exception as e:
         return False, str(e)
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat, dlon = lat2 - lat1, lon2 - lon1
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-    return 2 * asin(sqrt(a)) * 6371
-
-def get_district_coordinates(state_name, district_name):
-    """Get latitude and longitude for a district"""
-    try:
-        geolocator = Nominatim(user_agent="law_app")
-        location = geolocator.geocode(f"{district_name}, {state_name}, India")
-        
-        if location:
-            return {
-                'lat': location.latitude,
-                'lng': location.longitude
-            }
-        return None
-    except Exception as e:
-        logger.error(f"Geocoding error: {e}")
-        return None
-
-def search_nearby_police_stations(lat, lng, district_name):
-    """Search for police stations using OpenStreetMap Overpass API"""
-    try:
-        # Overpass API query for police stations within 15km
-        overpass_url = "http://overpass-api.de/api/interpreter"
-        overpass_query = f"""
-        [out:json][timeout:25];
-        (
-          node["amenity"="police"](around:15000,{lat},{lng});
-          way["amenity"="police"](around:15000,{lat},{lng});
-          relation["amenity"="police"](around:15000,{lat},{lng});
-        );
-        out center meta;
-        """
-        
-        response = requests.post(overpass_url, data=overpass_query, timeout=30)
-        data = response.json()
-        
-        stations = []
-        for element in data.get('elements', []):
-            # Get coordinates
-            if 'lat' in element and 'lon' in element:
-                station_lat, station_lon = element['lat'], element['lon']
-            elif 'center' in element:
-                station_lat, station_lon = element['center']['lat'], element['center']['lon']
-            else:
-                continue
-            
-            # Calculate distance
-            distance = geodesic((lat, lng), (station_lat, station_lon)).kilometers
-            
-            # Get station details
-            tags = element.get('tags', {})
-            station_name = tags.get('name', f'Police Station near {district_name}')
-            
-            stations.append({
-                'code': f"PS_{element.get('id', len(stations))}",
-                'name': station_name,
-                'latitude': station_lat,
-                'longitude': station_lon,
-                'distance_km': round(distance, 2),
-                'address': f"{tags.get('addr:street', '')} {tags.get('addr:city', '')}".strip(),
-                'phone': tags.get('phone', ''),
-                'source': 'openstreetmap'
-            })
-        
-        # Sort by distance and limit to 15 closest
-        stations.sort(key=lambda x: x['distance_km'])
-        return stations[:15]
-        
-    except Exception as e:
-        logger.error(f"Police station search error: {e}")
-        # Fallback to a few generic stations if API fails
-        return [
-            {
-                'code': f"PS_MAIN_{district_name.replace(' ', '_').upper()}",
-                'name': f"{district_name} Main Police Station",
-                'distance_km': 0.0,
-                'address': f"Main area, {district_name}",
-                'phone': '',
-                'source': 'fallback'
-            }
-        ]
-
-
-
-def get_area_from_coordinates(lat, lng):
-    """Get district/state information from coordinates with fallback"""
-    try:
-        geolocator = Nominatim(user_agent="law_app", timeout=5)
-        location = geolocator.reverse(f"{lat}, {lng}", timeout=5)
-        if location and location.raw.get('address'):
-            address = location.raw['address']
-            return {
-                'district': address.get('state_district', address.get('county', 'Unknown')),
-                'state': address.get('state', 'Unknown')
-            }
-    except (GeocoderTimedOut, GeocoderUnavailable, Exception) as e:
-        logger.error(f"Reverse geocoding error: {e}")
-    
-    # Fallback to default values
-    return {'district': 'Unknown', 'state': 'Unknown'}
-
-
 # ──────────────────────────────────────────────────────────────────────────────── 
 # ROOT + HEALTH
 # ──────────────────────────────────────────────────────────────────────────────── 
@@ -274,9 +172,14 @@ def index():
         features=["Email Validation", "Password Recovery", "Email Verification", "FIR Management", "Location Services"],
         endpoints={
             "acts": "/acts",
+            "acts_search": "/acts/search?q=<query>",
+            "act_sections": "/acts/<act_id>/sections",
+            "act_section": "/acts/<act_id>/sections/<section_number>",
+            "act_footnotes": "/acts/<act_id>/footnotes",
             "articles": "/articles", 
             "cases": "/cases",
             "lawyers": "/lawyers",
+            "lawyers_nearby": "/lawyers/nearby?lat=<lat>&lng=<lng>&radius=<km>&expertise=<area>",
             "chat": "/chat",
             "auth": {
                 "signup": "/auth/signup",
@@ -288,11 +191,15 @@ def index():
             "locations": {
                 "states": "/api/locations/states",
                 "districts": "/api/locations/districts/<state_code>",
-                "police_stations": "/api/locations/police-stations/<district_code>",
-                "nearby_stations": "/api/locations/police-stations-nearby"
+                "police_stations": "/api/locations/police-stations/<district_code>?refresh=<bool>",
+                "nearby_stations": "/api/locations/police-stations-nearby",
+                "nearby_stations_batch": "/api/locations/police-stations-nearby/batch"
             },
             "fir": {
                 "create": "/api/fir",
+                "list": "/api/fir?state_code=&district_code=&category=&since=&cursor=",
+                "batch": "/api/fir/batch",
+                "stats": "/api/fir/stats?state_code=&district_code=&category=&since=&until=&group_by=",
                 "track": "/api/fir/<fir_id>"
             }
         },
@@ -306,6 +213,25 @@ def health():
         database=msg,
         firebase_admin=fs is not None,
         email_service=bool(os.getenv('SMTP_EMAIL')),
+        email_outbox=email_outbox.stats(),
+        caches={
+            "forward_geocode": forward_geocode_cache.stats(),
+            "reverse_geocode": reverse_geocode_cache.stats(),
+            "overpass_tiles": overpass_tile_cache.stats()
+        },
+        upstreams={
+            "nominatim": {
+                "timing": nominatim_timer.stats(),
+                "rate_limit": nominatim_limiter.stats(),
+                "circuit": nominatim_breaker.stats()
+            },
+            "overpass": {
+                "timing": overpass_timer.stats(),
+                "rate_limit": overpass_limiter.stats(),
+                "circuit": overpass_breaker.stats(),
+                "hedging": overpass_poster.stats()
+            }
+        },
         environment_vars={
             'mongo_uri': bool(os.getenv('MONGO_URI')),
             'firebase_project_id': bool(os.getenv('FIREBASE_PROJECT_ID')),
@@ -538,44 +464,33 @@ def get_districts(state_code):
 
 @app.route("/api/locations/police-stations/<district_code>", methods=["GET"])
 def get_police_stations(district_code):
+    """Precomputed stations for a district (see warm_district_stations.py); ?refresh=true recomputes"""
     try:
         if db is None:
             return jsonify(error="Database not connected"), 500
         
-        # Get district information
-        district = db.districts.find_one({"code": district_code}, {"_id": 0})
-        if not district:
-            return jsonify(error="District not found"), 404
-        
-        # Get coordinates for the district
-        district_coords = get_district_coordinates(
-            district['state_name'], 
-            district['name']
-        )
-        
-        if not district_coords:
-            logger.warning(f"Could not get coordinates for {district['name']}")
-            # Return fallback stations
-            return jsonify([
-                {
-                    'code': f"PS_MAIN_{district['name'].replace(' ', '_').upper()}",
-                    'name': f"{district['name']} Main Police Station",
-                    'distance_km': 0.0,
-                    'address': f"Main area, {district['name']}",
-                    'phone': '',
-                    'source': 'fallback'
-                }
-            ])
+        refresh = request.args.get("refresh", "").lower() in ("1", "true", "yes")
+        doc = None if refresh else db.district_stations.find_one({"_id": district_code})
         
-        # Search for nearby police stations
-        nearby_stations = search_nearby_police_stations(
-            district_coords['lat'], 
-            district_coords['lng'],
-            district['name']
-        )
+        if doc is None:
+            # Not warmed yet (or a refresh was asked for): compute it now and keep it
+            district = db.districts.find_one({"code": district_code}, {"_id": 0})
+            if not district:
+                return jsonify(error="District not found"), 404
+            
+            doc = refresh_district_stations(district)
+            if doc is None:
+                # A failed refresh keeps serving the stored list; the generic station is the last resort
+                doc = db.district_stations.find_one({"_id": district_code}) if refresh else None
+                if doc is None:
+                    return jsonify(fallback_police_stations(district['name']))
+                logger.warning(f"Refresh failed for district {district_code}, serving the stored stations")
+            else:
+                logger.info(f"Computed {len(doc['stations'])} police stations for district {district_code}")
         
-        logger.info(f"Retrieved {len(nearby_stations)} police stations for district {district_code}")
-        return jsonify(nearby_stations)
+        response = jsonify(doc['stations'])
+        response.headers["X-Computed-At"] = doc['computed_at'].isoformat(timespec="seconds") + "Z"
+        return response
         
     except Exception as e:
         logger.error(f"Police stations fetch error: {e}")
@@ -585,6 +500,21 @@ def get_police_stations(district_code):
 # ────────────────────────────────────────────────────────────────────────────────
 # POLICE STATION LOCATOR API - THE MISSING ENDPOINT
 # ────────────────────────────────────────────────────────────────────────────────
+UNKNOWN_AREA = {'district': 'Unknown', 'state': 'Unknown'}
+
+def result_by_deadline(future, deadline, what, default):
+    """Return (result, late): the future's result, or default if it misses the deadline.
+
+    A late future is cancelled if it has not started yet; a running one stops at
+    its upstream timeouts, which run_by_deadline capped at the same deadline.
+    """
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0)), False
+    except FutureTimeout:
+        future.cancel()
+        logger.warning(f"{what} missed the {NEARBY_DEADLINE_SECONDS}s deadline")
+        return default, True
+
 @app.route("/api/locations/police-stations-nearby", methods=["POST"])
 def get_nearby_police_stations():
     """Get nearby police stations based on user's current location"""
@@ -607,15 +537,25 @@ def get_nearby_police_stations():
         
         logger.info(f"Searching for police stations near: {lat}, {lng}")
         
-        # Get area information from coordinates
-        area_info = get_area_from_coordinates(lat, lng)
+        # Reverse geocoding and the station search are independent, so run both
+        # at once and wait at most until the deadline for either
+        deadline = time.monotonic() + NEARBY_DEADLINE_SECONDS
+        area_future = upstream_executor.submit(run_by_deadline, deadline, get_area_from_coordinates, lat, lng)
+        stations_future = upstream_executor.submit(run_by_deadline, deadline, search_nearby_police_stations, lat, lng)
+
+        stations, stations_late = result_by_deadline(stations_future, deadline, "Police station search", None)
+        area_info, area_late = result_by_deadline(area_future, deadline, "Reverse geocoding", UNKNOWN_AREA)
+        partial = stations_late or area_late
+
         district_name = area_info.get('district', 'Unknown')
         state_name = area_info.get('state', 'Unknown')
         
         logger.info(f"Location identified as: {district_name}, {state_name}")
         
-        # Search for nearby police stations
-        stations = search_nearby_police_stations(lat, lng, district_name)
+        if stations is None:
+            stations = fallback_police_stations(district_name)
+        for station in stations:
+            station['name'] = station['name'] or unnamed_station_name(district_name)
         
         # Add additional metadata
         for station in stations:
@@ -630,7 +570,10 @@ def get_nearby_police_stations():
         
         logger.info(f"Found {len(stations)} police stations")
         
-        return jsonify(stations), 200
+        response = jsonify(stations)
+        if partial:
+            response.headers["X-Partial-Results"] = "true"
+        return response, 200
         
     except Exception as e:
         logger.error(f"Error in police station endpoint: {e}")
@@ -639,11 +582,93 @@ def get_nearby_police_stations():
             "message": str(e)
         }), 500
 
+@app.route("/api/locations/police-stations-nearby/batch", methods=["POST"])
+def get_nearby_police_stations_batch():
+    """Nearby police stations for several locations in one call"""
+    try:
+        data = request.get_json(silent=True) or {}
+        raw_points = data.get('points')
+        if not isinstance(raw_points, list) or not raw_points:
+            return jsonify({"error": "points must be a non-empty list of {latitude, longitude}"}), 400
+        if len(raw_points) > MAX_BATCH_POINTS:
+            return jsonify({"error": f"At most {MAX_BATCH_POINTS} points per batch"}), 400
+
+        points = []
+        for i, point in enumerate(raw_points):
+            try:
+                lat = float(point['latitude'])
+                lng = float(point['longitude'])
+            except (KeyError, ValueError, TypeError):
+                return jsonify({"error": f"Invalid latitude or longitude at points[{i}]"}), 400
+            if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+                return jsonify({"error": f"Invalid coordinate values at points[{i}]"}), 400
+            points.append((lat, lng))
+
+        # Points in the same geohash cell share one reverse geocoding lookup, and
+        # the station search fetches each map tile once for the whole batch
+        cells = [geohash_encode(lat, lng, REVERSE_GEOHASH_PRECISION) for lat, lng in points]
+        deadline = time.monotonic() + NEARBY_DEADLINE_SECONDS
+        cell_points = {}
+        for cell, point in zip(cells, points):
+            cell_points.setdefault(cell, point)
+        area_futures = {
+            cell: upstream_executor.submit(run_by_deadline, deadline, get_area_from_coordinates, lat, lng)
+            for cell, (lat, lng) in cell_points.items()
+        }
+        stations_future = upstream_executor.submit(run_by_deadline, deadline, search_nearby_police_stations_batch, points)
+
+        all_stations, partial = result_by_deadline(
+            stations_future, deadline, "Batch police station search", [None] * len(points)
+        )
+        areas = {}
+        for cell, future in area_futures.items():
+            areas[cell], late = result_by_deadline(future, deadline, "Reverse geocoding", UNKNOWN_AREA)
+            partial = partial or late
+
+        results = []
+        for (lat, lng), cell, stations in zip(points, cells, all_stations):
+            district_name = areas[cell].get('district', 'Unknown')
+            if stations is None:
+                stations = fallback_police_stations(district_name)
+            for station in stations:
+                station['name'] = station['name'] or unnamed_station_name(district_name)
+            results.append({
+                'latitude': lat,
+                'longitude': lng,
+                'district': district_name,
+                'state': areas[cell].get('state', 'Unknown'),
+                'stations': stations
+            })
+
+        logger.info(f"Batch search for {len(points)} points ({len(area_futures)} distinct areas)")
+
+        response = jsonify(results)
+        if partial:
+            response.headers["X-Partial-Results"] = "true"
+        return response, 200
+
+    except Exception as e:
+        logger.error(f"Error in batch police station endpoint: {e}")
+        return jsonify({
+            "error": "Failed to fetch nearby police stations",
+            "message": str(e)
+        }), 500
+
 
 # ──────────────────────────────────────────────────────────────────────────────── 
 # FIR ROUTES
 # ──────────────────────────────────────────────────────────────────────────────── 
 
+# FIRs are upserted on a unique fir_id, so a client retrying a save or re-syncing
+# its offline queue never stores the same FIR twice. Each new FIR also bumps its
+# (state, district, category, day) bucket in fir_stats for the dashboards.
+if db is not None:
+    try:
+        ensure_fir_indexes(db.fir_records)
+        ensure_stats_indexes(db.fir_stats)
+    except Exception as e:
+        logger.warning(f"⚠️ FIR indexes not created: {e}")
+
 @app.route("/api/fir", methods=["POST"])
 def create_fir():
     try:
@@ -652,16 +677,18 @@ def create_fir():
         if not fir_data:
             return jsonify(success=False, error="No data provided"), 400
         
-        # Validate required fields
-        required_fields = ['fir_id', 'complainant_name', 'category', 'description']
-        for field in required_fields:
-            if not fir_data.get(field):
-                return jsonify(success=False, error=f"Missing required field: {field}"), 400
+        error = validate_fir(fir_data)
+        if error:
+            return jsonify(success=False, error=error), 400
         
         # Store in database
         if db is not None:
-            result = db.fir_records.insert_one(fir_data)
-            logger.info(f"FIR created successfully: {fir_data.get('fir_id')} with MongoDB ID: {result.inserted_id}")
+            result = upsert_firs(db.fir_records, [fir_data], stats_collection=db.fir_stats)[0]
+            if result["status"] == CONFLICT:
+                return jsonify(success=False, fir_id=fir_data.get("fir_id"), status=CONFLICT, error=result["error"]), 409
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            logger.info(f"FIR {fir_data.get('fir_id')}: {result['status']}")
         else:
             logger.error("Database not connected - FIR not saved")
             return jsonify(success=False, error="Database not connected"), 500
@@ -669,12 +696,81 @@ def create_fir():
         return jsonify({
             "success": True,
             "fir_id": fir_data.get("fir_id"),
-            "message": "FIR created successfully"
+            "status": result["status"],
+            "message": "FIR created successfully" if result["status"] == CREATED else "FIR already exists"
         })
     except Exception as e:
         logger.error(f"FIR creation error: {e}")
         return jsonify(success=False, error=str(e)), 500
 
+@app.route("/api/fir", methods=["GET"])
+def list_firs():
+    """FIRs newest first, filtered by state_code, district_code, category and since.
+
+    Pages with limit/cursor like the content routes; the next cursor is in the
+    X-Next-Cursor header.
+    """
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        query = list_filters(request.args)
+        firs, next_cursor = find_page(db.fir_records, LIST_KEY, request.args, query=query, direction=-1)
+        return page_response([fir_json(fir) for fir in firs], next_cursor)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except Exception as e:
+        logger.error(f"FIR listing error: {e}")
+        return jsonify(error=str(e)), 500
+
+@app.route("/api/fir/stats", methods=["GET"])
+def fir_stats():
+    """FIR counts from the rollups, e.g. ?district_code=MH_PUNE&since=2024-01-01&group_by=category,day
+
+    Reads pre-aggregated buckets, so the cost depends on the number of buckets
+    matched, not on how many FIRs exist.
+    """
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        return jsonify(list(db.fir_stats.aggregate(stats_pipeline(request.args))))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except Exception as e:
+        logger.error(f"FIR stats error: {e}")
+        return jsonify(error=str(e)), 500
+
+@app.route("/api/fir/batch", methods=["POST"])
+def create_fir_batch():
+    """Store many FIRs in one round trip, e.g. an offline client syncing its queue.
+
+    Body: {"records": [{...FIR...}, ...]}. Returns one result per record, in
+    order, with status created, exists, conflict (fir_id taken by a different
+    FIR), duplicate, invalid or error.
+    """
+    try:
+        if db is None:
+            return jsonify(success=False, error="Database not connected"), 500
+
+        data = request.get_json(silent=True) or {}
+        records = data.get("records")
+        if not isinstance(records, list) or not records:
+            return jsonify(success=False, error="records must be a non-empty list"), 400
+        if len(records) > MAX_BATCH_RECORDS:
+            return jsonify(success=False, error=f"At most {MAX_BATCH_RECORDS} records per batch"), 400
+
+        results = upsert_firs(db.fir_records, records, stats_collection=db.fir_stats)
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        logger.info(f"FIR batch of {len(records)}: {counts}")
+
+        return jsonify(success=True, counts=counts, results=results)
+    except Exception as e:
+        logger.error(f"FIR batch error: {e}")
+        return jsonify(success=False, error=str(e)), 500
+
 @app.route("/api/fir/<fir_id>", methods=["GET"])
 def get_fir(fir_id):
     try:
@@ -682,7 +778,7 @@ def get_fir(fir_id):
             fir = db.fir_records.find_one({"fir_id": fir_id}, {"_id": 0})
             if fir:
                 logger.info(f"FIR retrieved successfully: {fir_id}")
-                return jsonify(fir)
+                return jsonify(fir_json(fir))
             else:
                 logger.warning(f"FIR not found: {fir_id}")
         else:
@@ -704,20 +800,137 @@ def get_acts():
         if db is None:
             return jsonify(error="Database not connected"), 500
         
-        acts = list(db.acts.find({}, {"_id": 0}).limit(50))
-        return jsonify(acts)
+        acts, next_cursor = find_page(db.acts, "act_id", request.args)
+
+        # Legacy clients that still expect sections inline on each act;
+        # schedules are left out, their parts are served by /acts/<id>/sections
+        if request.args.get("embed") == "sections" and acts:
+            sections_by_act = {}
+            for section in db.act_sections.find(
+                {"act_id": {"$in": [act["act_id"] for act in acts if "act_id" in act]}, "kind": "section"},
+                {"_id": 0, "act_id": 1, "section_number": 1, "title": 1, "content": 1},
+            ).sort([("act_id", 1), ("seq", 1)]):
+                sections_by_act.setdefault(section.pop("act_id"), []).append(section)
+            for act in acts:
+                act["sections"] = sections_by_act.get(act.get("act_id"), [])
+
+        return page_response(acts, next_cursor)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     except Exception as e:
         logger.error(f"Acts fetch error: {e}")
         return jsonify(error=str(e)), 500
 
+@app.route("/acts/<act_id>")
+def get_act(act_id):
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        act = db.acts.find_one({"act_id": act_id}, {"_id": 0})
+        if not act:
+            return jsonify(error="Act not found"), 404
+        return jsonify(act)
+    except Exception as e:
+        logger.error(f"Act fetch error: {e}")
+        return jsonify(error=str(e)), 500
+
+@app.route("/acts/<act_id>/sections")
+def get_act_sections(act_id):
+    """Table of contents for an act: section numbers and titles, no bodies"""
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        act = db.acts.find_one({"act_id": act_id}, {"_id": 0})
+        if not act:
+            return jsonify(error="Act not found"), 404
+
+        # Schedules are stored in parts; list each one once with its part count
+        toc = []
+        for entry in db.act_sections.find(
+            {"act_id": act_id},
+            {"_id": 0, "seq": 1, "kind": 1, "section_number": 1, "title": 1, "chapter": 1, "part": 1}
+        ).sort("seq", 1):
+            if entry.pop("part", 0) and toc and toc[-1]["section_number"] == entry["section_number"]:
+                toc[-1]["parts"] += 1
+                continue
+            entry["parts"] = 1
+            toc.append(entry)
+        act["sections"] = toc
+        return jsonify(act)
+    except Exception as e:
+        logger.error(f"Act sections fetch error: {e}")
+        return jsonify(error=str(e)), 500
+
+@app.route("/acts/<act_id>/footnotes")
+def get_act_footnotes(act_id):
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        footnotes = list(db.act_footnotes.find({"act_id": act_id}, {"_id": 0, "act_id": 0}).sort("page", 1))
+        return jsonify(footnotes)
+    except Exception as e:
+        logger.error(f"Act footnotes fetch error: {e}")
+        return jsonify(error=str(e)), 500
+
+@app.route("/acts/<act_id>/sections/<section_number>")
+def get_act_section(act_id, section_number):
+    """One section, or one part of a schedule (?part=<n>, counted from 0)"""
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        try:
+            part = int(request.args.get("part", 0))
+        except ValueError:
+            return jsonify(error="part must be an integer"), 400
+
+        query = {"act_id": act_id, "section_number": section_number}
+        if part:
+            query["part"] = part
+        section = db.act_sections.find_one(query, {"_id": 0}, sort=[("seq", 1)])
+        if not section:
+            return jsonify(error="Section not found"), 404
+        if section["kind"] != "section":
+            section["parts"] = db.act_sections.count_documents({"act_id": act_id, "section_number": section_number})
+        return jsonify(section)
+    except Exception as e:
+        logger.error(f"Act section fetch error: {e}")
+        return jsonify(error=str(e)), 500
+
+@app.route("/acts/search")
+def search_acts():
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify(error="Query parameter 'q' is required"), 400
+
+        try:
+            k = min(max(int(request.args.get("k", 10)), 1), 50)
+        except ValueError:
+            return jsonify(error="k must be an integer"), 400
+
+        results = search_sections(db, query, k)
+        logger.info(f"Search '{query}' returned {len(results['results'])} of {results['total_hits']} hits in {results['took_ms']} ms")
+        return jsonify(results)
+    except Exception as e:
+        logger.error(f"Acts search error: {e}")
+        return jsonify(error=str(e)), 500
+
 @app.route("/articles")
 def get_articles():
     try:
         if db is None:
             return jsonify(error="Database not connected"), 500
         
-        articles = list(db.articles.find({}, {"_id": 0}).limit(50))
-        return jsonify(articles)
+        return paginated_find(db.articles, "article_number", request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     except Exception as e:
         logger.error(f"Articles fetch error: {e}")
         return jsonify(error=str(e)), 500
@@ -728,8 +941,9 @@ def get_cases():
         if db is None:
             return jsonify(error="Database not connected"), 500
         
-        cases = list(db.cases.find({}, {"_id": 0}).limit(50))
-        return jsonify(cases)
+        return paginated_find(db.cases, "title", request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     except Exception as e:
         logger.error(f"Cases fetch error: {e}")
         return jsonify(error=str(e)), 500
@@ -740,12 +954,81 @@ def get_lawyers():
         if db is None:
             return jsonify(error="Database not connected"), 500
         
-        lawyers = list(db.lawyers.find({}, {"_id": 0}).limit(50))
-        return jsonify(lawyers)
+        return paginated_find(db.lawyers, "enrollment_number", request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     except Exception as e:
         logger.error(f"Lawyers fetch error: {e}")
         return jsonify(error=str(e)), 500
 
+# Nearby lawyers: $geoNear walks the 2dsphere index within the radius and the
+# pipeline scores every match on proximity and a review-weighted rating before
+# sorting, so lawyers sharing a city centroid are ranked on their reviews rather
+# than cut off in index order
+LAWYER_RADIUS_KM = 25
+MAX_LAWYER_RADIUS_KM = 500
+LAWYER_DISTANCE_SCALE_KM = 5
+LAWYER_PRIOR_RATING = 4.0
+LAWYER_PRIOR_REVIEWS = 20
+LAWYER_DISTANCE_WEIGHT = 0.6
+
+def lawyer_score_expression():
+    """$addFields expression blending proximity (1 at the door, 0.5 at 5 km) with a Bayesian-average rating"""
+    rating = {"$convert": {"input": "$rating", "to": "double", "onError": 0, "onNull": 0}}
+    reviews = {"$convert": {"input": "$reviews", "to": "double", "onError": 0, "onNull": 0}}
+    proximity = {"$divide": [1, {"$add": [1, {"$divide": ["$distance_km", LAWYER_DISTANCE_SCALE_KM]}]}]}
+    quality = {"$divide": [
+        {"$add": [{"$multiply": [rating, reviews]}, LAWYER_PRIOR_RATING * LAWYER_PRIOR_REVIEWS]},
+        {"$multiply": [{"$add": [reviews, LAWYER_PRIOR_REVIEWS]}, 5]},
+    ]}
+    return {"$round": [{"$add": [
+        {"$multiply": [LAWYER_DISTANCE_WEIGHT, proximity]},
+        {"$multiply": [1 - LAWYER_DISTANCE_WEIGHT, quality]},
+    ]}, 4]}
+
+@app.route("/lawyers/nearby")
+def get_nearby_lawyers():
+    try:
+        if db is None:
+            return jsonify(error="Database not connected"), 500
+
+        try:
+            lat = float(request.args["lat"])
+            lng = float(request.args["lng"])
+            radius_km = min(float(request.args.get("radius", LAWYER_RADIUS_KM)), MAX_LAWYER_RADIUS_KM)
+            limit = min(max(int(request.args.get("limit", 20)), 1), MAX_PAGE_SIZE)
+        except KeyError:
+            return jsonify(error="lat and lng are required"), 400
+        except ValueError:
+            return jsonify(error="lat, lng, radius and limit must be numbers"), 400
+        if not (-90 <= lat <= 90) or not (-180 <= lng <= 180) or radius_km <= 0:
+            return jsonify(error="Invalid coordinate values"), 400
+
+        query = {}
+        expertise = request.args.get("expertise", "").strip()
+        if expertise:
+            query = {"$or": [{"expertise": expertise}, {"specializations": expertise}]}
+
+        lawyers = db.lawyers.aggregate([
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [lng, lat]},
+                "distanceField": "distance_m",
+                "maxDistance": radius_km * 1000,
+                "query": query,
+                "spherical": True,
+            }},
+            {"$addFields": {"distance_km": {"$round": [{"$divide": ["$distance_m", 1000]}, 2]}}},
+            {"$addFields": {"score": lawyer_score_expression()}},
+            {"$sort": {"score": -1, "distance_km": 1, "_id": 1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "location": 0, "distance_m": 0}},
+        ], allowDiskUse=True)
+
+        return jsonify(list(lawyers))
+    except Exception as e:
+        logger.error(f"Nearby lawyers error: {e}")
+        return jsonify(error=str(e)), 500
+
 @app.route("/chat", methods=["POST"])
 def chat():
     try:
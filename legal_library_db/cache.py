@@ -0,0 +1,212 @@
+"""Read-through caches for slow upstream lookups.
+
+Each cache is an in-process LRU in front of an optional MongoDB collection.
+Entries in Mongo carry an `expires_at` date and a TTL index removes them once
+they expire, so the cache survives restarts and is shared between workers.
+
+A cache built with `stale_ttl` keeps entries past their fresh lifetime: a stale
+entry is still returned immediately while a background thread reloads it.
+
+Concurrent misses on the same key are coalesced: the first caller loads it and
+the others wait for that result instead of calling the upstream again.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+FRESH, STALE, MISSING = "fresh", "stale", "missing"
+
+
+class ReadThroughCache:
+    """LRU + MongoDB read-through cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, name, collection=None, ttl=30 * 86400, max_entries=2048, stale_ttl=0, coalesce_timeout=30):
+        self.name = name
+        self.collection = collection
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.coalesce_timeout = coalesce_timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.refreshing = set()
+        self.inflight = {}
+        self.counters = {
+            "hits": 0, "store_hits": 0, "stale_hits": 0, "misses": 0,
+            "coalesced": 0, "evictions": 0, "refreshes": 0,
+        }
+
+        if self.collection is not None:
+            try:
+                self.collection.create_index("expires_at", expireAfterSeconds=0)
+            except Exception as e:
+                logger.warning(f"Cache '{name}' TTL index not created: {e}")
+
+    def _key(self, key):
+        return f"{self.name}:{key}"
+
+    def _count(self, counter, amount=1):
+        with self.lock:
+            self.counters[counter] += amount
+
+    def _remember(self, key, value, fresh_until, expires_at):
+        with self.lock:
+            self.entries[key] = (fresh_until, expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def _lookup(self, key):
+        """Return (state, value) from memory, falling back to the Mongo store"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[1] > now:
+                self.entries.move_to_end(key)
+                if entry[0] > now:
+                    self.counters["hits"] += 1
+                    return FRESH, entry[2]
+                self.counters["stale_hits"] += 1
+                return STALE, entry[2]
+
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one({"_id": self._key(key)})
+                utcnow = datetime.utcnow()
+                if doc and doc["expires_at"] > utcnow:
+                    fresh_until = doc.get("fresh_until", doc["expires_at"])
+                    self._remember(
+                        key, doc["value"],
+                        now + (fresh_until - utcnow).total_seconds(),
+                        now + (doc["expires_at"] - utcnow).total_seconds(),
+                    )
+                    if fresh_until > utcnow:
+                        self._count("store_hits")
+                        return FRESH, doc["value"]
+                    self._count("stale_hits")
+                    return STALE, doc["value"]
+            except Exception as e:
+                logger.warning(f"Cache '{self.name}' read failed: {e}")
+
+        self._count("misses")
+        return MISSING, None
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss.
+
+        A loader result of None is returned but not cached, so failed upstream
+        calls are retried on the next request.
+        """
+        values = self.get_many([key], lambda keys: {key: loader()})
+        return values.get(key)
+
+    def get_many(self, keys, loader):
+        """Return {key: value} for keys; loader(missing_keys) must return a dict.
+
+        Missing keys are loaded synchronously in one loader call. Stale keys are
+        returned as-is and reloaded in the background.
+        """
+        values, missing, stale = {}, [], []
+        for key in keys:
+            state, value = self._lookup(key)
+            if state == MISSING:
+                missing.append(key)
+            else:
+                values[key] = value
+                if state == STALE:
+                    stale.append(key)
+
+        if missing:
+            owned, pending = self._claim(missing)
+            try:
+                loaded = (loader(owned) or {}) if owned else {}
+                for key in owned:
+                    if loaded.get(key) is not None:
+                        self.put(key, loaded[key])
+                        values[key] = loaded[key]
+            finally:
+                self._release(owned)
+
+            # Keys another thread was already loading: wait for its result
+            for key, done in pending.items():
+                done.wait(self.coalesce_timeout)
+                with self.lock:
+                    entry = self.entries.get(key)
+                    self.counters["coalesced"] += 1
+                if entry is not None:
+                    values[key] = entry[2]
+
+        if stale:
+            self._refresh_in_background(stale, loader)
+        return values
+
+    def _claim(self, keys):
+        """Split keys into ones this thread will load and {key: Event} already in flight"""
+        owned, pending = [], {}
+        with self.lock:
+            for key in keys:
+                if key in self.inflight:
+                    pending[key] = self.inflight[key]
+                else:
+                    self.inflight[key] = threading.Event()
+                    owned.append(key)
+        return owned, pending
+
+    def _release(self, keys):
+        with self.lock:
+            for key in keys:
+                self.inflight.pop(key).set()
+
+    def _refresh_in_background(self, keys, loader):
+        with self.lock:
+            keys = [key for key in keys if key not in self.refreshing]
+            self.refreshing.update(keys)
+        if not keys:
+            return
+
+        def refresh():
+            try:
+                loaded = loader(keys) or {}
+                for key in keys:
+                    if loaded.get(key) is not None:
+                        self.put(key, loaded[key])
+                self._count("refreshes", len(keys))
+            except Exception as e:
+                logger.warning(f"Cache '{self.name}' background refresh failed: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.difference_update(keys)
+
+        threading.Thread(target=refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+    def put(self, key, value):
+        now = time.time()
+        self._remember(key, value, now + self.ttl, now + self.ttl + self.stale_ttl)
+
+        if self.collection is not None:
+            # Mongo's TTL monitor compares against UTC
+            fresh_until = datetime.utcnow() + timedelta(seconds=self.ttl)
+            try:
+                self.collection.replace_one(
+                    {"_id": self._key(key)},
+                    {
+                        "_id": self._key(key),
+                        "value": value,
+                        "fresh_until": fresh_until,
+                        "expires_at": fresh_until + timedelta(seconds=self.stale_ttl),
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"Cache '{self.name}' write failed: {e}")
+
+    def stats(self):
+        with self.lock:
+            lookups = sum(self.counters[c] for c in ("hits", "store_hits", "stale_hits", "misses"))
+            hit_rate = (lookups - self.counters["misses"]) / lookups if lookups else 0.0
+            return dict(self.counters, size=len(self.entries), hit_rate=round(hit_rate, 3))
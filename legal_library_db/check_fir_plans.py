@@ -0,0 +1,56 @@
+"""Check that every FIR listing query stays on its index.
+
+Explains each filter combination the app accepts on GET /api/fir, for first
+pages and for cursor pages deep into the listing. A plan fails on a
+collection scan, an in-memory sort or reading too many index keys per FIR.
+Exits with status 1 if any plan fails, so it can gate a deploy:
+
+    cd legal_library_db && python check_fir_plans.py
+"""
+from pymongo import MongoClient
+from dotenv import load_dotenv
+import os
+import sys
+
+from fir_store import check_list_plans, list_cursor_samples
+
+# Load .env file to get MONGO_URI
+load_dotenv()
+
+def connect_to_mongodb():
+    client = MongoClient(os.getenv("MONGO_URI"))
+    return client["legal_library"]
+
+def list_samples(db):
+    """Listing filters to explain, with codes taken from the stored states and districts"""
+    sample_state = db.states.find_one({})
+    sample_district = db.districts.find_one({})
+    state_code = sample_state['code'] if sample_state else "XX"
+    district_code = sample_district['code'] if sample_district else "XX_01"
+    samples = [
+        {},
+        {"since": "2024-01-01"},
+        {"category": "Theft"},
+        {"state_code": state_code},
+        {"state_code": state_code, "category": "Theft", "since": "2024-01-01"},
+        {"district_code": district_code},
+        {"district_code": district_code, "category": "Theft", "since": "2024-01-01"},
+        {"state_code": state_code, "district_code": district_code, "category": "Theft"},
+    ]
+    return samples + list_cursor_samples(db.fir_records, samples)
+
+if __name__ == "__main__":
+    db = connect_to_mongodb()
+    print("🔍 FIR Listing Query Plans:")
+    print("-" * 40)
+    bad = 0
+    for args, stages, keys_examined, ok in check_list_plans(db.fir_records, list_samples(db)):
+        filters = {k: v for k, v in args.items() if k != "cursor"}
+        page = "cursor page" if "cursor" in args else "first page"
+        print(f"{'✅' if ok else '❌'} {filters or 'no filters'}, {page}: "
+              f"{' <- '.join(stages)} ({keys_examined} keys examined)")
+        bad += not ok
+    if bad:
+        print(f"❌ {bad} FIR listing queries would scan, sort in memory or read too many index keys; check the fir_records indexes")
+        sys.exit(1)
+    print("✅ All FIR listing queries use their indexes")
@@ -0,0 +1,28 @@
+"""MongoDB connection shared by the app and the modules it is built from.
+
+Connects once at import from MONGO_URI (read from .env); `db` is None when the
+URI is missing or the server cannot be reached, and callers check for that.
+"""
+import logging
+import os
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+mongo_uri = os.getenv("MONGO_URI")
+client, db = None, None
+
+if mongo_uri:
+    try:
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5_000)
+        client.admin.command("ping")
+        db = client["legal_library"]
+        logger.info("✅ MongoDB connected")
+    except Exception as e:
+        logger.error(f"❌ MongoDB connection failed: {e}")
+else:
+    logger.warning("⚠️ MONGO_URI missing in .env")
@@ -0,0 +1,419 @@
+"""FIR record writes keyed on a unique fir_id, and the indexes behind listing.
+
+Every write is an upsert that only sets fields on insert, so a client that
+retries a request (or re-syncs a queue it is unsure about) cannot create a
+second copy of a FIR or overwrite the one already filed. A write whose fir_id
+is taken by a different FIR is reported as a conflict, not as a retry.
+created_at is stored as a UTC date whatever form the client sent it in.
+Listing queries are equality filters plus a created_at range, newest first,
+and each filter combination has a compound index whose equality keys come
+first.
+
+Counts per (state, district, category, day) live in a rollup collection that
+each newly created FIR bumps with $inc, so dashboards read buckets instead of
+aggregating every FIR; rebuild_fir_stats recomputes it from scratch.
+"""
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from pagination import decode_cursor, encode_cursor, page_filter
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("fir_id", "complainant_name", "category", "description")
+MAX_BATCH_RECORDS = 500
+DUPLICATE_KEY = 11000
+
+CREATED, EXISTS, CONFLICT, DUPLICATE, INVALID, ERROR = "created", "exists", "conflict", "duplicate", "invalid", "error"
+
+# Listing: newest first, _id breaks ties for keyset pagination
+LIST_KEY = "created_at"
+LIST_FILTERS = ("state_code", "district_code", "category")
+LIST_SORT = [(LIST_KEY, -1), ("_id", -1)]
+LIST_INDEXES = [
+    [("district_code", 1), ("category", 1)] + LIST_SORT,
+    [("district_code", 1)] + LIST_SORT,
+    [("state_code", 1), ("category", 1)] + LIST_SORT,
+    [("state_code", 1)] + LIST_SORT,
+    [("category", 1)] + LIST_SORT,
+    LIST_SORT,
+]
+# Single-field indexes from before listing existed; each is a prefix of one above
+LEGACY_INDEXES = ("created_at_-1", "state_code_1", "district_code_1")
+
+# Timestamps sent without an offset (the app sends local time) are read in this
+# zone, and rollup days are its calendar days; India by default
+FIR_UTC_OFFSET_MINUTES = int(os.getenv("FIR_UTC_OFFSET_MINUTES", 330))
+FIR_TIMEZONE = timezone(timedelta(minutes=FIR_UTC_OFFSET_MINUTES))
+FIR_TIMEZONE_NAME = "{}{:02d}:{:02d}".format("-" if FIR_UTC_OFFSET_MINUTES < 0 else "+",
+                                             *divmod(abs(FIR_UTC_OFFSET_MINUTES), 60))
+
+# Rollups: one document per bucket, {state_code, district_code, category, day, count}
+STATS_KEYS = ("state_code", "district_code", "category", "day")
+
+
+def duplicate_fir_ids(collection, limit=5):
+    """A few fir_id values stored more than once"""
+    return [doc["_id"] for doc in collection.aggregate([
+        {"$group": {"_id": "$fir_id", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ], allowDiskUse=True)]
+
+
+def ensure_fir_indexes(collection):
+    """Create the unique fir_id index and the listing indexes, replacing older ones.
+
+    A non-unique fir_id index is only swapped for the unique one once no fir_id
+    is stored twice; until the duplicates are removed it stays in place.
+    """
+    existing = collection.index_information()
+    for name in LEGACY_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+
+    old = existing.get("fir_id_1")
+    if old is None or not old.get("unique"):
+        duplicates = duplicate_fir_ids(collection)
+        if duplicates:
+            logger.error(f"fir_records has duplicate fir_id values (e.g. {', '.join(map(str, duplicates))}); "
+                         "remove them before the unique index can be built")
+            collection.create_index("fir_id")
+        else:
+            if old is not None:
+                collection.drop_index("fir_id_1")
+            try:
+                collection.create_index("fir_id", unique=True)
+            except OperationFailure as e:
+                if e.code != DUPLICATE_KEY:
+                    raise
+                # A duplicate was written since the check; put the plain index back
+                logger.error("fir_records got a duplicate fir_id while the unique index was built; kept the plain index")
+                collection.create_index("fir_id")
+
+    for keys in LIST_INDEXES:
+        collection.create_index(keys)
+
+
+def ensure_stats_indexes(collection):
+    collection.create_index([(key, 1) for key in STATS_KEYS], unique=True)
+    collection.create_index([("district_code", 1), ("category", 1), ("day", 1)])
+
+
+def iso_date_arg(args, name):
+    value = args.get(name)
+    if value:
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an ISO date, e.g. 2024-01-31")
+    return value
+
+
+def parse_timestamp(value, name=LIST_KEY):
+    """UTC datetime, naive and cut to milliseconds as Mongo stores it, for an ISO string or datetime.
+
+    Strings without an offset are FIR_TIMEZONE local time; naive datetimes are
+    already UTC, as pymongo returns them.
+    """
+    if isinstance(value, datetime):
+        moment = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    else:
+        try:
+            moment = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except (AttributeError, ValueError):
+            raise ValueError(f"{name} must be an ISO timestamp, e.g. 2024-01-31T10:00:00")
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=FIR_TIMEZONE)
+    moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+def utc_now():
+    return parse_timestamp(datetime.utcnow())
+
+
+def fir_json(fir):
+    """A stored FIR for a JSON response, created_at as an ISO UTC timestamp"""
+    created_at = fir.get(LIST_KEY)
+    if isinstance(created_at, datetime):
+        fir = dict(fir, **{LIST_KEY: created_at.isoformat(timespec="milliseconds") + "Z"})
+    return fir
+
+
+def list_filters(args):
+    """Mongo filter for the state_code, district_code, category and since query arguments"""
+    query = {field: args[field] for field in LIST_FILTERS if args.get(field)}
+    since = args.get("since")
+    if since:
+        query[LIST_KEY] = {"$gte": parse_timestamp(since, "since")}
+    return query
+
+
+def plan_stages(plan):
+    """Every stage name in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+def list_cursor_samples(collection, samples, depth=1000):
+    """Each sample again with a cursor `depth` FIRs into its listing, to explain continuation pages.
+
+    Listings shorter than that get a cursor at the current time instead.
+    """
+    continued = []
+    for args in samples:
+        docs = list(collection.find(list_filters(args), {LIST_KEY: 1}).sort(LIST_SORT).skip(depth).limit(1))
+        if docs:
+            position = (docs[0].get(LIST_KEY), docs[0]["_id"])
+        else:
+            position = (utc_now(), ObjectId())
+        continued.append(dict(args, cursor=encode_cursor(*position)))
+    return continued
+
+
+def check_list_plans(collection, samples, limit=51):
+    """Explain the listing query for each sample of query arguments, cursor included.
+
+    Returns (args, stages, keys_examined, ok) per sample; ok means the winning
+    plan neither scans the collection nor sorts in memory, and reads at most a
+    few index keys per document returned.
+    """
+    checks = []
+    for args in samples:
+        after = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        query = page_filter(LIST_KEY, list_filters(args), after, direction=-1)
+        explain = collection.find(query).sort(LIST_SORT).limit(limit).explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        keys_examined = explain.get("executionStats", {}).get("totalKeysExamined", 0)
+        ok = "COLLSCAN" not in stages and "SORT" not in stages and keys_examined <= 3 * limit
+        checks.append((args, stages, keys_examined, ok))
+    return checks
+
+
+def validate_fir(record):
+    """Return an error message for a record that cannot be stored, or None"""
+    if not isinstance(record, dict):
+        return "Record must be an object"
+    for field in REQUIRED_FIELDS:
+        if not record.get(field):
+            return f"Missing required field: {field}"
+    if not isinstance(record["fir_id"], str):
+        return "fir_id must be a string"
+    if record.get(LIST_KEY) is not None:
+        try:
+            parse_timestamp(record[LIST_KEY])
+        except ValueError as e:
+            return str(e)
+    return None
+
+
+def fir_day(created_at):
+    """Rollup day (YYYY-MM-DD, in FIR_TIMEZONE) of a created_at value, or None"""
+    if isinstance(created_at, datetime):
+        return parse_timestamp(created_at).replace(tzinfo=timezone.utc).astimezone(FIR_TIMEZONE).strftime("%Y-%m-%d")
+    if isinstance(created_at, str) and created_at:
+        return created_at[:10]
+    return None
+
+
+def stats_bucket(record):
+    return tuple(fir_day(record.get(LIST_KEY)) if key == "day" else record.get(key) for key in STATS_KEYS)
+
+
+def increment_stats(collection, records):
+    """$inc the rollup bucket of each record, one upsert per distinct bucket"""
+    buckets = Counter(stats_bucket(record) for record in records)
+    if buckets:
+        collection.bulk_write([
+            UpdateOne(dict(zip(STATS_KEYS, bucket)), {"$inc": {"count": count}}, upsert=True)
+            for bucket, count in buckets.items()
+        ], ordered=False)
+
+
+def fir_document(record):
+    """The document stored for a valid record: created_at parsed to UTC, or stamped if missing"""
+    document = {k: v for k, v in record.items() if k != "_id"}
+    created_at = record.get(LIST_KEY)
+    document[LIST_KEY] = parse_timestamp(created_at) if created_at is not None else utc_now()
+    return document
+
+
+def same_fir(stored, record):
+    """True if a stored FIR holds what `record` sent, i.e. writing it again was a retry.
+
+    The created_at stamped on a record sent without one is not compared.
+    """
+    stored = {k: v for k, v in stored.items() if k != "_id"}
+    sent = fir_document(record)
+    if record.get(LIST_KEY) is None:
+        stored.pop(LIST_KEY, None)
+        sent.pop(LIST_KEY)
+    return stored == sent
+
+
+def upsert_firs(collection, records, stats_collection=None):
+    """Write FIRs in one unordered bulk_write; returns one result dict per record, in order.
+
+    status is created, exists (the same FIR is already stored), conflict (the
+    fir_id belongs to a different stored FIR, left untouched), duplicate (same
+    fir_id earlier in this batch), invalid or error. Only created records are
+    counted into stats_collection, so retries never double count.
+    """
+    results = [{"index": i, "fir_id": r.get("fir_id") if isinstance(r, dict) else None} for i, r in enumerate(records)]
+    ops, op_items, documents, seen = [], [], [], {}
+
+    for i, record in enumerate(records):
+        error = validate_fir(record)
+        if error:
+            results[i].update(status=INVALID, error=error)
+        elif record["fir_id"] in seen:
+            results[i].update(status=DUPLICATE, duplicate_of=seen[record["fir_id"]])
+        else:
+            seen[record["fir_id"]] = i
+            # Listing and rollups both key on created_at, so it is always a UTC date
+            document = fir_document(record)
+            ops.append(UpdateOne({"fir_id": record["fir_id"]}, {"$setOnInsert": document}, upsert=True))
+            op_items.append(i)
+            documents.append(document)
+
+    if not ops:
+        return results
+
+    try:
+        upserted = set(collection.bulk_write(ops, ordered=False).upserted_ids)
+        write_errors = []
+    except BulkWriteError as e:
+        upserted = {u["index"] for u in e.details.get("upserted", [])}
+        write_errors = e.details.get("writeErrors", [])
+
+    failed = {write_error["index"]: write_error for write_error in write_errors}
+
+    for op_index, i in enumerate(op_items):
+        write_error = failed.get(op_index)
+        if write_error is None:
+            results[i]["status"] = CREATED if op_index in upserted else EXISTS
+        elif write_error.get("code") == DUPLICATE_KEY:
+            # Lost an upsert race with a concurrent write of the same FIR
+            results[i]["status"] = EXISTS
+        else:
+            results[i].update(status=ERROR, error=write_error.get("errmsg", "Write failed"))
+
+    # A fir_id that was already taken is only a retry if the stored FIR is the same one
+    existing = [i for i in op_items if results[i]["status"] == EXISTS]
+    if existing:
+        stored = {
+            doc["fir_id"]: doc
+            for doc in collection.find({"fir_id": {"$in": [records[i]["fir_id"] for i in existing]}}, {"_id": 0})
+        }
+        for i in existing:
+            doc = stored.get(records[i]["fir_id"])
+            if doc is not None and not same_fir(doc, records[i]):
+                results[i].update(status=CONFLICT, error="fir_id is already used by a different FIR")
+
+    if stats_collection is not None:
+        created = [documents[op_index] for op_index, i in enumerate(op_items) if results[i]["status"] == CREATED]
+        try:
+            increment_stats(stats_collection, created)
+        except Exception as e:
+            # The FIRs are stored; a rebuild brings the rollups back in line
+            logger.warning(f"FIR stats not updated for {len(created)} records: {e}")
+    return results
+
+
+def stats_pipeline(args):
+    """Aggregation over the rollups for the /api/fir/stats query arguments.
+
+    Filters on state_code, district_code, category and since/until (days,
+    inclusive) and sums counts per group_by fields (comma separated, any of
+    state_code, district_code, category, day; default category).
+    """
+    match = {field: args[field] for field in LIST_FILTERS if args.get(field)}
+    since, until = iso_date_arg(args, "since"), iso_date_arg(args, "until")
+    if since or until:
+        match["day"] = {}
+        if since:
+            match["day"]["$gte"] = since[:10]
+        if until:
+            match["day"]["$lte"] = until[:10]
+
+    group_by = [field.strip() for field in args.get("group_by", "category").split(",") if field.strip()]
+    for field in group_by:
+        if field not in STATS_KEYS:
+            raise ValueError(f"group_by must be among {', '.join(STATS_KEYS)}")
+
+    return [
+        {"$match": match},
+        {"$group": {"_id": {field: f"${field}" for field in group_by}, "count": {"$sum": "$count"}}},
+        {"$project": dict({"_id": 0, "count": 1}, **{field: f"$_id.{field}" for field in group_by})},
+        {"$sort": dict({field: 1 for field in group_by}, count=-1)},
+    ]
+
+
+def normalize_created_at(collection, batch_size=1000):
+    """Convert created_at values stored as strings by older versions to UTC dates.
+
+    Returns (converted, unparseable); unparseable values are left as they are.
+    """
+    converted, unparseable, ops = 0, 0, []
+    for doc in collection.find({LIST_KEY: {"$type": "string"}}, {LIST_KEY: 1}):
+        try:
+            value = parse_timestamp(doc[LIST_KEY])
+        except ValueError:
+            unparseable += 1
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"], LIST_KEY: doc[LIST_KEY]}, {"$set": {LIST_KEY: value}}))
+        if len(ops) >= batch_size:
+            converted += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        converted += collection.bulk_write(ops, ordered=False).modified_count
+    return converted, unparseable
+
+
+def rebuild_fir_stats(fir_collection, stats_collection):
+    """Recompute every rollup bucket from fir_records and swap the result in.
+
+    FIRs created while the aggregation runs are missed, so run it when
+    writes are quiet. Returns the number of buckets.
+    """
+    database = fir_collection.database
+    staging = database[f"{stats_collection.name}_rebuild"]
+    staging.drop()
+
+    day = {"$switch": {
+        "branches": [
+            {"case": {"$eq": [{"$type": f"${LIST_KEY}"}, "date"]},
+             "then": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${LIST_KEY}", "timezone": FIR_TIMEZONE_NAME}}},
+            {"case": {"$eq": [{"$type": f"${LIST_KEY}"}, "string"]},
+             "then": {"$substrCP": [f"${LIST_KEY}", 0, 10]}},
+        ],
+        "default": None,
+    }}
+    fir_collection.aggregate([
+        {"$group": {
+            "_id": {"state_code": "$state_code", "district_code": "$district_code", "category": "$category", "day": day},
+            "count": {"$sum": 1},
+        }},
+        {"$project": dict({"_id": 0, "count": 1}, **{key: {"$ifNull": [f"$_id.{key}", None]} for key in STATS_KEYS})},
+        {"$out": staging.name},
+    ], allowDiskUse=True)
+
+    ensure_stats_indexes(staging)
+    buckets = staging.count_documents({})
+    staging.rename(stats_collection.name, dropTarget=True)
+    return buckets
@@ -0,0 +1,169 @@
+"""Shared geographic helpers for the location services."""
+import argparse
+import time
+from math import cos, radians
+
+import numpy as np
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+KM_PER_DEGREE_LAT = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+
+def geohash_encode(lat, lng, precision=6):
+    """Encode a coordinate as a geohash cell id (precision 6 is roughly 1.2 x 0.6 km)"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision):
+    """(lat_height, lng_width) in degrees of a geohash cell at this precision"""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_bbox(geohash):
+    """Return (south, west, north, east) of a geohash cell"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            bit = (bits >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def covering_geohashes(lat, lng, radius_km, precision):
+    """Geohash cells at this precision that intersect the bounding box of a circle"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlng = radius_km / (KM_PER_DEGREE_LAT * max(cos(radians(lat)), 0.01))
+    cell_lat, cell_lng = geohash_cell_size(precision)
+
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    west, east = max(lng - dlng, -180.0), min(lng + dlng, 180.0)
+
+    # Walk the cell centres on the geohash grid that covers the box
+    first_lat = (int((south + 90.0) // cell_lat) + 0.5) * cell_lat - 90.0
+    first_lng = (int((west + 180.0) // cell_lng) + 0.5) * cell_lng - 180.0
+    cells = []
+    cell_center_lat = first_lat
+    while cell_center_lat - cell_lat / 2 < north:
+        cell_center_lng = first_lng
+        while cell_center_lng - cell_lng / 2 < east:
+            cells.append(geohash_encode(min(cell_center_lat, 89.999999), min(cell_center_lng, 179.999999), precision))
+            cell_center_lng += cell_lng
+        cell_center_lat += cell_lat
+    return cells
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km; any argument may be a NumPy array"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearest_k(lat, lng, lats, lngs, k, max_km=None):
+    """Return (indices, distances_km) of the k points nearest to (lat, lng), nearest first"""
+    distances = haversine_km(lat, lng, lats, lngs)
+    candidates = np.arange(distances.size) if max_km is None else np.flatnonzero(distances <= max_km)
+
+    # argpartition is O(n); only the k survivors get sorted
+    if candidates.size > k:
+        candidates = candidates[np.argpartition(distances[candidates], k - 1)[:k]]
+    order = candidates[np.argsort(distances[candidates], kind="stable")]
+    return order, distances[order]
+
+
+class NearestCentroidIndex:
+    """Nearest-centroid lookup over a fixed set of labelled points, e.g. district centres"""
+
+    def __init__(self, points):
+        points = list(points)
+        self.labels = [label for _, _, label in points]
+        self.lats = np.array([lat for lat, _, _ in points], dtype=float)
+        self.lngs = np.array([lng for _, lng, _ in points], dtype=float)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def nearest(self, lat, lng, max_km=None):
+        """Return (label, distance_km) of the closest point, or None if none is within max_km"""
+        if not self.labels:
+            return None
+        order, distances = nearest_k(lat, lng, self.lats, self.lngs, 1, max_km=max_km)
+        if not order.size:
+            return None
+        return self.labels[order[0]], float(distances[0])
+
+
+def normalize_place(*parts):
+    """Normalize a place name into a cache key, e.g. (' Pune ', 'MAHARASHTRA') -> 'pune, maharashtra'"""
+    return ", ".join(" ".join(str(part).lower().split()) for part in parts if part)
+
+
+def benchmark_ranking(sizes=(1000, 10000, 100000), k=15, radius_km=15):
+    """Compare the geopy.geodesic loop + full sort with nearest_k on random candidates"""
+    from geopy.distance import geodesic
+
+    rng = np.random.default_rng(42)
+    lat, lng = 18.5204, 73.8567
+    print(f"{'candidates':>10}  {'geodesic loop':>14}  {'vectorized':>11}  {'speedup':>8}")
+    for size in sizes:
+        lats = lat + rng.uniform(-0.2, 0.2, size)
+        lngs = lng + rng.uniform(-0.2, 0.2, size)
+
+        started = time.perf_counter()
+        distances = [geodesic((lat, lng), (a, b)).kilometers for a, b in zip(lats, lngs)]
+        loop_top = sorted((d, i) for i, d in enumerate(distances) if d <= radius_km)[:k]
+        loop_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        order, _ = nearest_k(lat, lng, lats, lngs, k, max_km=radius_km)
+        vector_seconds = time.perf_counter() - started
+
+        overlap = len({i for _, i in loop_top} & set(order.tolist()))
+        print(f"{size:>10}  {loop_seconds * 1000:>11.1f} ms  {vector_seconds * 1000:>8.2f} ms  "
+              f"{loop_seconds / vector_seconds:>7.0f}x  (top-{k} overlap {overlap}/{len(loop_top)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geo helper benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    benchmark_ranking(args.sizes)
@@ -0,0 +1,136 @@
+from pymongo import MongoClient, ReplaceOne
+from datetime import datetime
+import argparse
+import json
+import os
+from dotenv import load_dotenv
+
+# Load .env file to get MONGO_URI
+load_dotenv()
+
+BATCH_SIZE = 1000
+SOURCE = "openstreetmap"
+
+# Accepted extract formats:
+#   Overpass JSON    {"elements": [...]} from  nwr["amenity"="police"](area); out center tags;
+#   GeoJSON          {"type": "FeatureCollection", ...} from osmium export / ogr2ogr
+
+def connect_to_mongodb():
+    client = MongoClient(os.getenv("MONGO_URI"))
+    return client["legal_library"]
+
+def ensure_indexes(db):
+    db.police_stations.create_index([("location", "2dsphere")])
+    db.police_stations.create_index("code")
+    db.police_stations.create_index("osm_id")
+    db.police_stations.create_index([("source", 1), ("extract", 1), ("imported_at", 1)])
+
+def ring_centroid(coordinates):
+    """Mean of a polygon's outer ring vertices - close enough for a station building"""
+    ring = coordinates[0] if coordinates and isinstance(coordinates[0][0], list) else coordinates
+    lngs = [point[0] for point in ring]
+    lats = [point[1] for point in ring]
+    return sum(lats) / len(lats), sum(lngs) / len(lngs)
+
+def overpass_elements(data):
+    """Yield (osm_id, lat, lng, tags) from Overpass JSON elements"""
+    for element in data.get("elements", []):
+        if "lat" in element and "lon" in element:
+            lat, lng = element["lat"], element["lon"]
+        elif "center" in element:
+            lat, lng = element["center"]["lat"], element["center"]["lon"]
+        else:
+            continue
+        yield f"{element.get('type', 'node')}/{element['id']}", lat, lng, element.get("tags", {})
+
+def geojson_features(data):
+    """Yield (osm_id, lat, lng, tags) from GeoJSON point or polygon features"""
+    for feature in data.get("features", []):
+        geometry = feature.get("geometry") or {}
+        coordinates = geometry.get("coordinates")
+        if not coordinates:
+            continue
+        if geometry.get("type") == "Point":
+            lng, lat = coordinates[0], coordinates[1]
+        elif geometry.get("type") == "Polygon":
+            lat, lng = ring_centroid(coordinates)
+        elif geometry.get("type") == "MultiPolygon":
+            lat, lng = ring_centroid(coordinates[0])
+        else:
+            continue
+        properties = feature.get("properties") or {}
+        tags = properties.get("tags", properties)
+        osm_id = feature.get("id") or properties.get("@id") or properties.get("osm_id")
+        yield str(osm_id), lat, lng, tags
+
+def station_doc(osm_id, lat, lng, tags, extract, imported_at):
+    return {
+        "code": f"PS_{osm_id.split('/')[-1]}",
+        "osm_id": osm_id,
+        "name": tags.get("name", tags.get("name:en", "")),
+        "location": {"type": "Point", "coordinates": [lng, lat]},
+        "address": f"{tags.get('addr:street', '')} {tags.get('addr:city', '')}".strip(),
+        "phone": tags.get("phone", tags.get("contact:phone", "")),
+        "type": "osm",
+        "source": SOURCE,
+        "extract": extract,
+        "imported_at": imported_at,
+    }
+
+def load_extract(filepath):
+    with open(filepath, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("type") == "FeatureCollection":
+        return geojson_features(data)
+    return overpass_elements(data)
+
+def extract_name(filepath):
+    """Region label for an extract file, e.g. 'kerala' for extracts/kerala-police.json"""
+    return os.path.splitext(os.path.basename(filepath))[0].replace("-police", "")
+
+def import_police_stations(db, filepath, batch_size=BATCH_SIZE, extract=None, replace=False):
+    """Upsert every police amenity in the extract and drop the stations it no longer has.
+
+    Extracts are usually regional, so only stations that an earlier import of the
+    same extract loaded are dropped; replace=True treats this file as the complete
+    set and drops every other OSM station.
+    """
+    ensure_indexes(db)
+    extract = extract or extract_name(filepath)
+    imported_at = datetime.now()
+    ops, imported, skipped = [], 0, 0
+
+    for osm_id, lat, lng, tags in load_extract(filepath):
+        if tags.get("amenity", "police") != "police" or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            skipped += 1
+            continue
+        doc = station_doc(osm_id, lat, lng, tags, extract, imported_at)
+        ops.append(ReplaceOne({"osm_id": osm_id}, doc, upsert=True))
+        if len(ops) >= batch_size:
+            db.police_stations.bulk_write(ops, ordered=False)
+            imported += len(ops)
+            ops = []
+    if ops:
+        db.police_stations.bulk_write(ops, ordered=False)
+        imported += len(ops)
+
+    stale = {"source": SOURCE, "imported_at": {"$lt": imported_at}}
+    if not replace:
+        stale["extract"] = extract
+    removed = db.police_stations.delete_many(stale).deleted_count
+    print(f"✅ Imported {imported} police stations from {filepath} as '{extract}' "
+          f"({skipped} skipped, {removed} removed{' across all extracts' if replace else ''})")
+    return imported
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load an OSM police station extract into MongoDB")
+    parser.add_argument("extract", help="Overpass JSON or GeoJSON file of amenity=police features")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="documents per bulk_write call")
+    parser.add_argument("--name", help="region label for this extract (default: file name); "
+                                       "re-importing the same label drops stations it no longer has")
+    parser.add_argument("--replace", action="store_true",
+                        help="this file is the complete set: drop OSM stations from every other extract too")
+    args = parser.parse_args()
+
+    db = connect_to_mongodb()
+    import_police_stations(db, args.extract, batch_size=args.batch_size, extract=args.name, replace=args.replace)
@@ -1,87 +1,635 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import argparse
+import hashlib
 import json
 import os
+import time
 from dotenv import load_dotenv
+from search_index import build_search_index, update_search_index
 
 # Load .env file to get MONGO_URI
 load_dotenv()
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["legal_library"]
-acts_collection = db["acts"]
 
-# Clear old data
-print("🧹 Deleting existing documents in 'acts' collection...")
-acts_collection.delete_many({})
-print("✅ Cleared.\n")
+BATCH_SIZE = 500
 
-def flatten_paragraphs(paragraphs):
-    content = []
+def connect_to_mongodb():
+    client = MongoClient(os.getenv("MONGO_URI"))
+    return client["legal_library"]
+
+def reset_collections(db):
+    # Clear old data
+    print("🧹 Deleting existing documents in 'acts', 'act_sections', 'act_footnotes' and 'import_manifest' collections...")
+    db.acts.delete_many({})
+    db.act_sections.delete_many({})
+    db.act_footnotes.delete_many({})
+    db.import_manifest.delete_many({})
+    print("✅ Cleared.\n")
+
+def ensure_indexes(db):
+    db.acts.create_index("act_id", unique=True)
+    db.acts.create_index("source_id", unique=True)
+    db.act_sections.create_index([("act_id", 1), ("section_number", 1), ("part", 1)])
+    db.act_sections.create_index([("act_id", 1), ("seq", 1)], unique=True)
+    db.act_footnotes.create_index([("act_id", 1), ("page", 1)])
+
+def paragraph_lines(paragraphs):
+    """Yield the non-empty lines of a paragraphs tree ({"text", "contains"} nodes at any depth)"""
     if isinstance(paragraphs, dict):
-        for para in paragraphs.values():
-            if isinstance(para, dict):
-                text = para.get("text", "")
-                content.append(text.strip())
-
-                subpoints = para.get("contains")
-                if isinstance(subpoints, dict):
-                    content.extend([str(p).strip() for p in subpoints.values()])
-            elif isinstance(para, str):
-                content.append(para.strip())
-    elif isinstance(paragraphs, list):
-        content.extend([str(p).strip() for p in paragraphs])
+        paragraphs = paragraphs.values()
     elif isinstance(paragraphs, str):
-        content.append(paragraphs.strip())
-    return "\n".join(content)
-
-def extract_sections(parts):
-    all_sections = []
-    if isinstance(parts, dict):
-        for part in parts.values():
-            sections = part.get("Sections", {})
-            if isinstance(sections, dict):
-                for sec_key, sec_val in sections.items():
-                    section_number = sec_key.replace("Section ", "").strip()
-                    section_title = sec_val.get("heading", "Untitled")
-                    paragraphs = sec_val.get("paragraphs", {})
-                    section_content = flatten_paragraphs(paragraphs)
-
-                    all_sections.append({
-                        "section_number": section_number,
-                        "title": section_title,
-                        "content": section_content
-                    })
-    return all_sections
+        paragraphs = [paragraphs]
+    elif not isinstance(paragraphs, list):
+        return
 
-def normalize_act_data(raw, act_id):
+    for para in paragraphs:
+        if isinstance(para, dict):
+            text = str(para.get("text", "")).strip()
+            if text:
+                yield text
+            yield from paragraph_lines(para.get("contains", {}))
+        elif para is not None:
+            line = str(para).strip()
+            if line:
+                yield line
+
+def flatten_paragraphs(paragraphs):
+    """Join a paragraphs tree into plain text"""
+    return "\n".join(paragraph_lines(paragraphs))
+
+SECTION_CONTAINERS = ("Sections", "Chapters", "Parts")
+ANNEX_KINDS = {"Schedule": "schedule", "Annexure": "annexure", "Appendix": "appendix", "Forms": "form"}
+HEADER_KEYS = ("Act Title", "Act ID", "Enactment Date", "Act Definition")
+
+# Layouts seen in central_acts/ (858 files):
+#   Sections/<key>                                   433 files
+#   Chapters/<n>/Sections/<key>                      366 files
+#   Chapters/<n>/Subheadings/[i]/Sections/<key>
+#   Parts/<n>/Sections/<key>, Parts/Sections/<key>    59 files
+#   Schedule|Annexure|Appendix|Forms/<name>          paragraph trees
+#   Footnotes/Page <n>/<i>                           footnote strings keyed by page
+
+# Schedules can run to megabytes (the First Schedule of 197551.json is 1.5 MB),
+# so an annex is stored as one part per top-level entry, and an entry longer
+# than this is cut into several parts at line boundaries
+ANNEX_PART_CHARS = 16384
+
+def record_kind(path):
+    """Classify a path into the act: a section, an annex-like block, a footnote page or None"""
+    if len(path) >= 2 and path[0] in SECTION_CONTAINERS and path[-2] == "Sections":
+        return "section"
+    if len(path) == 2 and path[0] in ANNEX_KINDS:
+        return ANNEX_KINDS[path[0]]
+    if len(path) == 2 and path[0] == "Footnotes":
+        return "footnote"
+    return None
+
+def chapter_label(chapter):
+    return " — ".join(str(chapter[key]).strip() for key in ("ID", "Name") if chapter.get(key)) or None
+
+def normalize_record(kind, key, value, chapter=None):
+    if kind == "section":
+        return {
+            "kind": kind,
+            "section_number": key.replace("Section ", "").strip().rstrip("."),
+            "title": value.get("heading", "Untitled"),
+            "content": flatten_paragraphs(value.get("paragraphs", {})),
+            "chapter": chapter,
+        }
+    if kind == "footnote":
+        page = key.replace("Page", "").strip()
+        return {
+            "kind": kind,
+            "page": int(page) if page.isdigit() else page,
+            "notes": [flatten_paragraphs(note) for note in (value.values() if isinstance(value, dict) else value)],
+        }
+    raise ValueError(f"{kind} records are split into parts, see AnnexParts")
+
+class AnnexParts:
+    """Cuts the lines of a schedule-like block into parts of at most ~ANNEX_PART_CHARS.
+
+    Every top-level entry starts a new part; both parse paths feed it the same
+    lines, so they produce the same parts.
+    """
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.part = 0
+        self.lines = []
+        self.size = 0
+
+    def add(self, line):
+        self.lines.append(line)
+        self.size += len(line) + 1
+        if self.size >= ANNEX_PART_CHARS:
+            return self.flush()
+        return None
+
+    def flush(self):
+        if not self.lines:
+            return None
+        record = {
+            "kind": self.kind,
+            "section_number": self.name,
+            "title": self.name.title(),
+            "content": "\n".join(self.lines),
+            "chapter": None,
+            "part": self.part,
+        }
+        self.part += 1
+        self.lines, self.size = [], 0
+        return record
+
+def annex_records(kind, name, value):
+    """Parts of a loaded Schedule/Annexure/Appendix/Forms block"""
+    parts = AnnexParts(kind, name)
+    for entry in value.values() if isinstance(value, dict) else value:
+        for line in paragraph_lines([entry]):
+            record = parts.add(line)
+            if record:
+                yield record
+        record = parts.flush()
+        if record:
+            yield record
+
+def iter_records(node, path=(), chapter=None):
+    """Single pass over a loaded act, yielding normalized records in file order"""
+    if isinstance(node, dict):
+        items = node.items()
+    elif isinstance(node, list):
+        items = (("item", value) for value in node)
+    else:
+        return
+    for key, value in items:
+        child = path + (key,)
+        kind = record_kind(child)
+        if kind in ANNEX_KINDS.values():
+            if isinstance(value, (dict, list)):
+                yield from annex_records(kind, key, value)
+        elif kind:
+            if isinstance(value, (dict, list)) and (kind != "section" or isinstance(value, dict)):
+                yield normalize_record(kind, key, value, chapter)
+        elif isinstance(value, (dict, list)):
+            if len(child) == 2 and child[0] in ("Chapters", "Parts") and isinstance(value, dict):
+                yield from iter_records(value, child, chapter_label(value))
+            else:
+                yield from iter_records(value, child, chapter)
+
+def extract_records(raw):
+    return list(iter_records({key: value for key, value in raw.items() if key not in HEADER_KEYS}))
+
+def annex_container_role(parent_role, key, event):
+    """Role of a map/array opened inside an annex: "paras" holds paragraphs, "para" is one"""
+    if parent_role == "paras" and event == "start_map":
+        return "para"
+    if parent_role == "para" and key == "contains":
+        return "paras"
+    return None
+
+def stream_annex(events, kind, name):
+    """Consume one annex block from the parser, yielding its parts as lines arrive.
+
+    Mirrors paragraph_lines without building the block, so memory stays at one
+    part no matter how large the schedule is.
+    """
+    parts = AnnexParts(kind, name)
+    roles, keys = ["paras"], [None]
+    for _, event, value in events:
+        if event == "map_key":
+            keys[-1] = value
+            continue
+        if event in ("start_map", "start_array"):
+            roles.append(annex_container_role(roles[-1], keys[-1], event))
+            keys.append(None)
+            continue
+        if event in ("end_map", "end_array"):
+            roles.pop()
+            keys.pop()
+            if not roles:
+                return
+            if len(roles) == 1:
+                record = parts.flush()
+                if record:
+                    yield record
+            continue
+
+        role, key = roles[-1], keys[-1]
+        if role == "paras" and value is not None or role == "para" and key in ("text", "contains"):
+            if role == "para" and key == "contains" and not isinstance(value, str):
+                continue
+            line = str(value).strip()
+            record = parts.add(line) if line else None
+            if record:
+                yield record
+        if len(roles) == 1:
+            record = parts.flush()
+            if record:
+                yield record
+
+def stream_act_records(filepath):
+    """Stream an act file, yielding ("header", key, value) and ("record", record).
+
+    Only one section, footnote page or schedule part is materialised at a time,
+    so peak memory is bounded by the largest record rather than by the file size.
+    """
+    import ijson
+
+    path, builder, depth, chapter = [], None, 0, {}
+    with open(filepath, "rb") as f:
+        events = ijson.parse(f, use_float=True)
+        for _, event, value in events:
+            if builder is not None:
+                builder.event(event, value)
+                if event in ("start_map", "start_array"):
+                    depth += 1
+                elif event in ("end_map", "end_array"):
+                    depth -= 1
+                    if depth == 0:
+                        kind = record_kind(path)
+                        if kind:
+                            yield "record", normalize_record(kind, path[-1], builder.value, chapter_label(chapter))
+                        else:
+                            yield "header", path[0], builder.value
+                        builder = None
+                continue
+
+            if event == "map_key":
+                path[-1] = value
+                continue
+            if event in ("end_map", "end_array"):
+                path.pop()
+                continue
+
+            kind = record_kind(path)
+            if kind in ANNEX_KINDS.values() and event in ("start_map", "start_array"):
+                for record in stream_annex(events, kind, path[-1]):
+                    yield "record", record
+                continue
+            is_header = len(path) == 1 and path[0] in HEADER_KEYS
+            if event in ("start_map", "start_array") and (is_header or kind and (kind != "section" or event == "start_map")):
+                builder, depth = ijson.ObjectBuilder(), 1
+                builder.event(event, value)
+                continue
+            if is_header:
+                yield "header", path[0], value
+                continue
+
+            if len(path) == 2 and path[0] in ("Chapters", "Parts") and event == "start_map":
+                chapter = {}
+            elif len(path) == 3 and path[0] in ("Chapters", "Parts") and path[2] in ("ID", "Name"):
+                chapter[path[2]] = value
+
+            if event == "start_map":
+                path.append(None)
+            elif event == "start_array":
+                path.append("item")
+
+def act_header(raw, act_id):
+    description = flatten_paragraphs(raw.get("Act Definition", "")).replace("\n", " ")
     return {
         "act_id": str(act_id),
+        "source_id": raw.get("Act ID"),
         "act_name": raw.get("Act Title", "Untitled"),
-        "description": " ".join(raw.get("Act Definition", {}).values()) if isinstance(raw.get("Act Definition"), dict) else raw.get("Act Definition", "No description"),
-        "sections": extract_sections(raw.get("Parts", {}))
+        "enactment_date": raw.get("Enactment Date"),
+        "description": description or "No description",
     }
 
-def import_acts(folder_path):
-    act_id = 1
-    files = [f for f in os.listdir(folder_path) if f.endswith(".json")]
+def normalize_act_data(raw, act_id):
+    act = act_header(raw, act_id)
+    records = extract_records(raw)
+    act["sections"] = [record for record in records if record["kind"] != "footnote"]
+    act["footnotes"] = [record for record in records if record["kind"] == "footnote"]
+    return act
+
+def section_doc(act_id, seq, section):
+    return {
+        "act_id": act_id,
+        "seq": seq,
+        "kind": section["kind"],
+        "section_number": section["section_number"],
+        "title": section["title"],
+        "content": section["content"],
+        "chapter": section["chapter"],
+        "part": section.get("part", 0),
+    }
+
+def footnote_doc(act_id, footnote):
+    return {"act_id": act_id, "page": footnote["page"], "notes": footnote["notes"]}
+
+def split_act(act):
+    """Split a normalized act into a light header, per-section documents and footnote pages"""
+    header = {key: value for key, value in act.items() if key not in ("sections", "footnotes")}
+    header["section_count"] = len(act["sections"])
+    section_docs = [section_doc(act["act_id"], seq, section) for seq, section in enumerate(act["sections"])]
+    footnote_docs = [footnote_doc(act["act_id"], footnote) for footnote in act["footnotes"]]
+    return header, section_docs, footnote_docs
+
+def stream_act_file(filepath, act_id, writer):
+    """Import one act through the streaming parser, feeding the writer record by record"""
+    raw_header, seq = {}, 0
+    for record in stream_act_records(filepath):
+        if record[0] == "header":
+            raw_header[record[1]] = record[2]
+        elif record[1]["kind"] == "footnote":
+            writer.add("act_footnotes", [footnote_doc(str(act_id), record[1])])
+        else:
+            writer.add("act_sections", [section_doc(str(act_id), seq, record[1])])
+            seq += 1
+
+    header = act_header(raw_header, act_id)
+    header["section_count"] = seq
+    writer.upsert("acts", {"source_id": header["source_id"]}, header)
+    return header
+
+def load_act_file(task):
+    """Parse and normalize one act file; runs inside a worker process"""
+    filepath, act_id = task
+    filename = os.path.basename(filepath)
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            raw_data = json.load(f)
+        header, section_docs, footnote_docs = split_act(normalize_act_data(raw_data, act_id))
+        return filename, header, section_docs, footnote_docs, None
+    except Exception as e:
+        return filename, None, None, None, str(e)
+
+class BulkWriter:
+    """Buffers write operations per collection and flushes them with unordered bulk_write.
+
+    Each operation remembers the act it belongs to, so a failed act can be
+    discarded from the buffers and acts with write errors can be reported.
+    """
+
+    def __init__(self, db, batch_size=BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.written = 0
+        self.errors = 0
+        self.failed_acts = set()
+
+    def _queue(self, collection_name, operations):
+        buffer = self.buffers.setdefault(collection_name, [])
+        buffer.extend(operations)
+        if len(buffer) >= self.batch_size:
+            self.flush(collection_name)
+
+    def add(self, collection_name, docs):
+        self._queue(collection_name, [(InsertOne(doc), doc.get("act_id")) for doc in docs])
+
+    def upsert(self, collection_name, filter, doc):
+        self._queue(collection_name, [(ReplaceOne(filter, doc, upsert=True), doc.get("act_id"))])
+
+    def discard(self, act_id):
+        """Drop every buffered operation of one act"""
+        for name, buffer in self.buffers.items():
+            self.buffers[name] = [item for item in buffer if item[1] != act_id]
+
+    def flush(self, collection_name=None):
+        names = [collection_name] if collection_name else list(self.buffers)
+        for name in names:
+            buffer = self.buffers.get(name)
+            if not buffer:
+                continue
+            try:
+                result = self.db[name].bulk_write([operation for operation, _ in buffer], ordered=False)
+                self.written += result.inserted_count + result.upserted_count + result.modified_count
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+                self.written += sum(e.details.get(key, 0) for key in ("nInserted", "nUpserted", "nModified"))
+                self.errors += len(write_errors)
+                self.failed_acts.update(buffer[error["index"]][1] for error in write_errors if buffer[error["index"]][1])
+                print(f"❌ {len(write_errors)} write errors in '{name}' batch")
+            self.buffers[name] = []
+
+def file_sha256(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def plan_import(db, folder_path, files):
+    """Compare file hashes with the stored manifest.
+
+    Returns (tasks, hashes, removed, unchanged): tasks are (filepath, act_id) for
+    new or changed files, and act ids are kept stable per file across runs.
+    """
+    manifest = {entry["_id"]: entry for entry in db.import_manifest.find()}
+    next_id = max([int(entry["act_id"]) for entry in manifest.values()] + [0]) + 1
+
+    tasks, hashes, unchanged = [], {}, 0
+    for filename in files:
+        filepath = os.path.join(folder_path, filename)
+        hashes[filename] = file_sha256(filepath)
+        entry = manifest.get(filename)
+        if entry and entry["sha256"] == hashes[filename]:
+            unchanged += 1
+            continue
+        if entry:
+            act_id = entry["act_id"]
+        else:
+            act_id, next_id = str(next_id), next_id + 1
+        tasks.append((filepath, act_id))
+
+    removed = [entry for name, entry in manifest.items() if name not in hashes]
+    return tasks, hashes, removed, unchanged
+
+def remove_acts(db, entries):
+    for entry in entries:
+        db.acts.delete_one({"act_id": entry["act_id"]})
+        db.act_sections.delete_many({"act_id": entry["act_id"]})
+        db.act_footnotes.delete_many({"act_id": entry["act_id"]})
+        db.import_manifest.delete_one({"_id": entry["_id"]})
+        print(f"🗑️ Removed: {entry['_id']} (act {entry['act_id']})")
+
+def import_acts(db, folder_path, workers=None, batch_size=BATCH_SIZE, stream=False, full=False):
+    files = sorted(f for f in os.listdir(folder_path) if f.endswith(".json"))
 
     if not files:
         print("⚠️ No JSON files found in folder.")
         return
 
-    for filename in files:
-        filepath = os.path.join(folder_path, filename)
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                raw_data = json.load(f)
-                act = normalize_act_data(raw_data, act_id)
-                acts_collection.insert_one(act)
-                print(f"✅ Imported: {filename} as '{act['act_name']}'")
-                act_id += 1
-        except Exception as e:
-            print(f"❌ Failed to import {filename}: {e}")
-
-    print(f"\n🎉 Import completed. {act_id - 1} files imported.")
+    # Without a manifest there is nothing to diff against, so rebuild from scratch
+    rebuild = full or db.import_manifest.estimated_document_count() == 0
+    if rebuild:
+        reset_collections(db)
+    ensure_indexes(db)
+
+    tasks, hashes, removed, unchanged = plan_import(db, folder_path, files)
+    print(f"📋 {len(tasks)} new or changed, {unchanged} unchanged, {len(removed)} removed.")
+    remove_acts(db, removed)
+
+    # Only the postings of these acts are rewritten in the search index
+    touched = [act_id for _, act_id in tasks] + [entry["act_id"] for entry in removed]
+
+    if not tasks:
+        if removed:
+            print(f"🔍 Removing {len(removed)} acts from the full-text search index...")
+            update_search_index(db, touched)
+        print("✅ Nothing to import.")
+        return
+
+    writer = BulkWriter(db, batch_size)
+    imported, failed = [], 0
+    started = time.perf_counter()
+
+    def replace_sections(act_id):
+        # Always cleared, not just for changed acts: a failed earlier run may have left partial sections
+        db.act_sections.delete_many({"act_id": act_id})
+        db.act_footnotes.delete_many({"act_id": act_id})
+
+    if stream:
+        # Serial on purpose: each section goes straight to the writer, so memory stays flat
+        for filepath, act_id in tasks:
+            try:
+                replace_sections(act_id)
+                stream_act_file(filepath, act_id, writer)
+                imported.append((os.path.basename(filepath), act_id))
+            except Exception as e:
+                # Drop what this file already queued or flushed, so no partial act is left behind
+                writer.discard(act_id)
+                replace_sections(act_id)
+                print(f"❌ Failed to import {os.path.basename(filepath)}: {e}")
+                failed += 1
+        results = []
+        executor = None
+    elif workers == 1:
+        results = map(load_act_file, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(load_act_file, tasks, chunksize=8)
+
+    try:
+        for filename, header, section_docs, footnote_docs, error in results:
+            if error:
+                print(f"❌ Failed to import {filename}: {error}")
+                failed += 1
+                continue
+            replace_sections(header["act_id"])
+            writer.upsert("acts", {"source_id": header["source_id"]}, header)
+            writer.add("act_sections", section_docs)
+            writer.add("act_footnotes", footnote_docs)
+            imported.append((filename, header["act_id"]))
+        writer.flush()
+    finally:
+        if executor:
+            executor.shutdown()
+
+    # An act with write errors is incomplete: keep it out of the manifest so the next run retries it
+    for filename, act_id in imported:
+        if act_id in writer.failed_acts:
+            print(f"❌ Failed to import {filename}: write errors in act {act_id}")
+            failed += 1
+    imported = [(filename, act_id) for filename, act_id in imported if act_id not in writer.failed_acts]
+
+    now = datetime.now()
+    for filename, act_id in imported:
+        writer.upsert("import_manifest", {"_id": filename}, {
+            "_id": filename,
+            "sha256": hashes[filename],
+            "act_id": act_id,
+            "imported_at": now,
+        })
+    writer.flush()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n🎉 Import completed. {len(imported)} files imported, {failed} failed.")
+    print(f"⚡ Wrote {writer.written} documents in {elapsed:.2f}s ({writer.written / elapsed:.0f} docs/sec, {writer.errors} write errors).")
+
+    if rebuild:
+        print("🔍 Building full-text search index...")
+        doc_count, term_count = build_search_index(db)
+        print(f"✅ Indexed {doc_count} sections ({term_count} distinct terms).")
+    else:
+        print(f"🔍 Updating full-text search index for {len(touched)} acts...")
+        doc_count, posting_count = update_search_index(db, touched)
+        print(f"✅ Re-indexed {doc_count} sections ({posting_count} posting lists).")
+
+def benchmark_memory(folder_path, count=4):
+    """Compare peak traced memory of json.load vs streaming on the largest act files"""
+    import tracemalloc
+
+    files = sorted(
+        (os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".json")),
+        key=os.path.getsize,
+    )
+    if not files:
+        print("⚠️ No JSON files found in folder.")
+        return
+    samples = files[-count:][::-1] + files[len(files) // 2:len(files) // 2 + 1]
+
+    print(f"{'file':<20} {'size MB':>8} {'json.load MB':>13} {'stream MB':>10} {'sections':>9}")
+    for filepath in samples:
+        tracemalloc.start()
+        with open(filepath, "r", encoding="utf-8") as f:
+            header, section_docs, footnote_docs = split_act(normalize_act_data(json.load(f), 0))
+        _, loaded_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del header, section_docs, footnote_docs
+
+        # A writer with nowhere to write: keeps only the current record alive
+        sink = BulkWriter(None, batch_size=1)
+        sink.flush = lambda collection_name=None: sink.buffers.clear()
+        tracemalloc.start()
+        header = stream_act_file(filepath, 0, sink)
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{os.path.basename(filepath):<20} {os.path.getsize(filepath) / 2**20:>8.2f} "
+              f"{loaded_peak / 2**20:>13.2f} {stream_peak / 2**20:>10.2f} {header['section_count']:>9}")
+
+def benchmark_normalizer(folder_path):
+    """Normalize the whole corpus with both parse paths and report throughput"""
+    files = sorted(os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".json"))
+    if not files:
+        print("⚠️ No JSON files found in folder.")
+        return
+    total_mb = sum(os.path.getsize(filepath) for filepath in files) / 2**20
+
+    kinds, empty = {}, []
+    started = time.perf_counter()
+    for filepath in files:
+        with open(filepath, "r", encoding="utf-8") as f:
+            act = normalize_act_data(json.load(f), 0)
+        for record in act["sections"] + act["footnotes"]:
+            kinds[record["kind"]] = kinds.get(record["kind"], 0) + 1
+        if not any(record["kind"] == "section" for record in act["sections"]):
+            empty.append(os.path.basename(filepath))
+    loaded_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    streamed = sum(1 for filepath in files for record in stream_act_records(filepath) if record[0] == "record")
+    stream_elapsed = time.perf_counter() - started
+
+    records = sum(kinds.values())
+    print(f"📚 {len(files)} files, {total_mb:.1f} MB, {records} records: "
+          + ", ".join(f"{count} {kind}" for kind, count in sorted(kinds.items())))
+    print(f"⚡ json.load: {loaded_elapsed:.2f}s ({kinds.get('section', 0) / loaded_elapsed:.0f} sections/sec, {total_mb / loaded_elapsed:.1f} MB/s)")
+    print(f"⚡ stream:    {stream_elapsed:.2f}s ({streamed / stream_elapsed:.0f} records/sec, {total_mb / stream_elapsed:.1f} MB/s)")
+    if empty:
+        print(f"⚠️ {len(empty)} files produced no sections: {', '.join(empty[:10])}")
 
 # Entry point
 if __name__ == "__main__":
-    import_acts("central_acts")
+    parser = argparse.ArgumentParser(description="Import central acts into MongoDB")
+    parser.add_argument("folder", nargs="?", default="central_acts")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (1 = serial, default = CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="documents per insert_many call")
+    parser.add_argument("--stream", action="store_true", help="parse files incrementally with bounded memory")
+    parser.add_argument("--full", action="store_true", help="drop everything and re-import all files")
+    parser.add_argument("--benchmark-memory", action="store_true", help="compare peak memory of the two parse paths and exit")
+    parser.add_argument("--benchmark-normalize", action="store_true", help="measure corpus-wide normalizer throughput and exit")
+    args = parser.parse_args()
+
+    if args.benchmark_memory:
+        benchmark_memory(args.folder)
+    elif args.benchmark_normalize:
+        benchmark_normalizer(args.folder)
+    else:
+        db = connect_to_mongodb()
+        import_acts(db, args.folder, workers=args.workers, batch_size=args.batch_size, stream=args.stream, full=args.full)
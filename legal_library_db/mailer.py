@@ -0,0 +1,334 @@
+"""Durable email outbox drained by a background SMTP worker.
+
+Request handlers only insert a message into the `email_outbox` collection. A
+daemon thread claims pending messages in batches, sends them over one reused,
+authenticated SMTP session and retries failures with exponential backoff.
+Claims are atomic, so every app process can run its own worker. Message
+bodies carry live reset and verification links, so they are removed once a
+message is sent or has failed for good.
+"""
+import argparse
+import logging
+import random
+import smtplib
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+SENT_RETENTION = 7 * 86400
+CLAIM_TIMEOUT = 600
+
+
+class SMTPOutbox:
+    """MongoDB-backed outbox with a pooled SMTP session and retry with backoff"""
+
+    def __init__(self, collection, host, port, username=None, password=None, starttls=True,
+                 batch_size=20, poll_interval=2.0, idle_timeout=60, max_attempts=6, base_backoff=30):
+        self.collection = collection
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+
+        self.server = None
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.worker = None
+        self.counters = {"queued": 0, "sent": 0, "retries": 0, "failed": 0, "connections": 0}
+
+        if self.collection is not None:
+            try:
+                self.collection.create_index([("status", 1), ("next_attempt_at", 1)])
+                self.collection.create_index("sent_at", expireAfterSeconds=SENT_RETENTION)
+            except Exception as e:
+                logger.warning(f"Email outbox indexes not created: {e}")
+
+    # ── SMTP session ──────────────────────────────────────────────────────────
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.starttls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self.counters["connections"] += 1
+        return server
+
+    def _session(self):
+        """Return the open SMTP session, reconnecting if the server dropped it"""
+        if self.server is not None:
+            try:
+                if time.monotonic() - self.last_used > 10:
+                    self.server.noop()
+            except smtplib.SMTPException:
+                self.close()
+        if self.server is None:
+            self.server = self._connect()
+        self.last_used = time.monotonic()
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    def _deliver(self, to_email, subject, html_content):
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = self.username
+        message["To"] = to_email
+        message.attach(MIMEText(html_content, "html", "utf-8"))
+        payload = message.as_string().encode("utf-8")
+
+        try:
+            self._session().sendmail(self.username, to_email, payload)
+        except smtplib.SMTPServerDisconnected:
+            # The pooled session went away between messages; retry once on a fresh one
+            self.close()
+            self._session().sendmail(self.username, to_email, payload)
+
+    # ── Outbox ────────────────────────────────────────────────────────────────
+
+    def enqueue(self, to_email, subject, html_content):
+        """Queue a message for the worker; without a collection, send it right away"""
+        if not self.username:
+            logger.error("SMTP credentials not configured")
+            return False
+
+        if self.collection is None:
+            try:
+                with self.lock:
+                    self._deliver(to_email, subject, html_content)
+                self.counters["sent"] += 1
+                return True
+            except Exception as e:
+                logger.error(f"SMTP email failed: {e}")
+                return False
+
+        now = datetime.utcnow()
+        self.collection.insert_one({
+            "to": to_email,
+            "subject": subject,
+            "html": html_content,
+            "status": PENDING,
+            "attempts": 0,
+            "created_at": now,
+            "next_attempt_at": now,
+        })
+        self.counters["queued"] += 1
+        self.wakeup.set()
+        return True
+
+    def _claim_batch(self):
+        now = datetime.utcnow()
+        batch = []
+        while len(batch) < self.batch_size:
+            doc = self.collection.find_one_and_update(
+                {"$or": [
+                    {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                    # Messages claimed by a worker that died mid-batch
+                    {"status": SENDING, "claimed_at": {"$lt": now - timedelta(seconds=CLAIM_TIMEOUT)}},
+                ]},
+                {"$set": {"status": SENDING, "claimed_at": now}},
+                sort=[("next_attempt_at", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                break
+            batch.append(doc)
+        return batch
+
+    def _failed(self, doc, error):
+        attempts = doc.get("attempts", 0) + 1
+        update = {"$set": {"attempts": attempts, "last_error": str(error)}}
+        if attempts >= self.max_attempts:
+            update["$set"]["status"] = FAILED
+            update["$unset"] = {"html": ""}
+            self.counters["failed"] += 1
+            logger.error(f"Email to {doc['to']} failed permanently after {attempts} attempts: {error}")
+        else:
+            delay = self.base_backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+            update["$set"]["status"] = PENDING
+            update["$set"]["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=delay)
+            self.counters["retries"] += 1
+            logger.warning(f"Email to {doc['to']} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+        self.collection.update_one({"_id": doc["_id"]}, update)
+
+    def drain_once(self):
+        """Send one batch of due messages; returns how many were claimed"""
+        batch = self._claim_batch()
+        with self.lock:
+            for doc in batch:
+                try:
+                    self._deliver(doc["to"], doc["subject"], doc["html"])
+                except Exception as e:
+                    self.close()
+                    self._failed(doc, e)
+                    continue
+                self.collection.update_one(
+                    {"_id": doc["_id"]},
+                    {"$set": {"status": SENT, "sent_at": datetime.utcnow()}, "$unset": {"html": ""}, "$inc": {"attempts": 1}},
+                )
+                self.counters["sent"] += 1
+                logger.info(f"Email sent successfully to {doc['to']}")
+        return len(batch)
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                if self.drain_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+
+            with self.lock:
+                if self.server is not None and time.monotonic() - self.last_used > self.idle_timeout:
+                    self.close()
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+
+    def start(self):
+        if self.collection is None or self.worker is not None:
+            return
+        self.worker = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self.worker.start()
+
+    def stop(self, timeout=30):
+        """Stop the worker after its current batch and close the SMTP session"""
+        if self.worker is None:
+            return
+        self.stopping.set()
+        self.wakeup.set()
+        self.worker.join(timeout)
+        self.worker = None
+        self.stopping.clear()
+        with self.lock:
+            self.close()
+
+    def stats(self):
+        stats = dict(self.counters, worker_running=bool(self.worker and self.worker.is_alive()))
+        if self.collection is not None:
+            try:
+                stats["backlog"] = self.collection.count_documents({"status": {"$in": [PENDING, SENDING]}})
+            except Exception:
+                pass
+        return stats
+
+
+# ── Benchmark against a local SMTP stand-in ───────────────────────────────────
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept and discard mail"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                self.reply("250 localhost")
+            elif command == b"DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 queued")
+            elif command == b"QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+def start_smtp_sink(port=0):
+    """Run a throwaway SMTP server on localhost; returns the server (address in .server_address)"""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", port), _SinkHandler)
+    server.daemon_threads = True
+    server.messages = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_smtp(collection, count=500, latency=0.0, timeout=300):
+    """Compare one connection per message with the outbox: enqueue into `collection`, let the worker drain it"""
+    sink = start_smtp_sink()
+    host, port = sink.server_address
+    collection.drop()
+    outbox = SMTPOutbox(collection, host, port, username="bench@localhost", starttls=False)
+
+    started = time.perf_counter()
+    for i in range(count):
+        server = smtplib.SMTP(host, port, timeout=30)
+        time.sleep(latency)
+        server.sendmail("bench@localhost", f"user{i}@localhost", b"Subject: bench\r\n\r\nhello")
+        server.quit()
+    per_message = time.perf_counter() - started
+
+    # Handshake latency is charged once per pooled connection, as above per message
+    connect = outbox._connect
+
+    def slow_connect():
+        time.sleep(latency)
+        return connect()
+
+    outbox._connect = slow_connect
+    outbox.start()
+    received = sink.messages
+    started = time.perf_counter()
+    for i in range(count):
+        outbox.enqueue(f"user{i}@localhost", "bench", "<p>hello</p>")
+    queued = time.perf_counter() - started
+    while collection.count_documents({"status": SENT}) < count and time.perf_counter() - started < timeout:
+        time.sleep(0.05)
+    drained = time.perf_counter() - started
+    outbox.stop()
+    sent = collection.count_documents({"status": SENT})
+    bodies_left = collection.count_documents({"html": {"$exists": True}})
+    collection.drop()
+
+    print(f"📨 {count} messages to a local SMTP sink ({sink.messages - received} received through the outbox)")
+    print(f"   connection per message: {per_message:.2f}s ({count / per_message:.0f} msg/s)")
+    print(f"   outbox enqueue:         {queued:.2f}s ({count / queued:.0f} msg/s on the request path)")
+    print(f"   outbox worker drain:    {drained:.2f}s ({sent / drained:.0f} msg/s, "
+          f"{outbox.counters['connections']} connections, {bodies_left} bodies left)")
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    import os
+
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="SMTP outbox benchmark against a local stand-in server")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--handshake-latency", type=float, default=0.0,
+                        help="extra seconds per connection, e.g. 0.3 to mimic TLS + login to a remote server")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+                        help="MongoDB holding the throwaway legal_library.email_outbox_benchmark collection")
+    args = parser.parse_args()
+    client = MongoClient(args.mongo_uri)
+    benchmark_smtp(client["legal_library"]["email_outbox_benchmark"], args.count, args.handshake_latency)
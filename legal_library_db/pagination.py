@@ -0,0 +1,113 @@
+"""Keyset pagination on (key, _id) for the list routes.
+
+A page is `limit` documents sorted on key then _id; the opaque cursor encodes
+the last document's (key value, _id) and the next page starts strictly after
+it, so every page is an index range scan however deep the client pages.
+"""
+import base64
+import json
+import re
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+FIELD_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_.]*$')
+
+
+def encode_cursor(key_value, object_id):
+    # Dates go in tagged so the next page compares them as dates, not strings
+    if isinstance(key_value, datetime):
+        key_value = {"$date": key_value.isoformat()}
+    raw = json.dumps([key_value, str(object_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key_value, object_id = json.loads(raw)
+        if isinstance(key_value, dict):
+            key_value = datetime.fromisoformat(key_value["$date"])
+        return key_value, ObjectId(object_id)
+    except (ValueError, TypeError, KeyError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+def parse_page_args(args):
+    """Read limit, cursor and fields= from the query string"""
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+
+    cursor = args.get("cursor")
+    after = decode_cursor(cursor) if cursor else None
+
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()]
+    for field in fields:
+        if not FIELD_NAME_PATTERN.match(field):
+            raise ValueError(f"Invalid field name: {field}")
+    return limit, after, fields
+
+
+def after_cursor(key, key_value, object_id, direction):
+    """Filter for documents that sort after (key_value, object_id) in this direction.
+
+    The plain range on key next to the $or keeps the index bounds tight, so a
+    deep page does not scan the index from its start.
+    """
+    # Documents missing the key sort first ascending and last descending
+    if direction == 1:
+        if key_value is None:
+            return {"$or": [{key: {"$ne": None}}, {key: None, "_id": {"$gt": object_id}}]}
+        return {key: {"$gte": key_value}, "$or": [{key: {"$gt": key_value}}, {key: key_value, "_id": {"$gt": object_id}}]}
+    if key_value is None:
+        return {key: None, "_id": {"$lt": object_id}}
+    # $not/$gt rather than $lte, which would drop the documents missing the key
+    return {
+        key: {"$not": {"$gt": key_value}},
+        "$or": [{key: {"$lt": key_value}}, {key: None}, {key: key_value, "_id": {"$lt": object_id}}],
+    }
+
+
+def page_filter(key, query=None, after=None, direction=1):
+    """query narrowed to the documents after the cursor position `after` ((key_value, _id) or None)"""
+    query = dict(query or {})
+    if after:
+        cursor_query = after_cursor(key, *after, direction)
+        query = {"$and": [query, cursor_query]} if query else cursor_query
+    return query
+
+
+def find_page(collection, key, args, query=None, direction=1):
+    """Keyset-paginate a collection on (key, _id) so every page is an index range scan.
+
+    query narrows the documents (its equality fields should prefix the index on
+    key); direction=-1 pages newest/highest first.
+    """
+    limit, after, fields = parse_page_args(args)
+    query = page_filter(key, query, after, direction)
+
+    projection = None
+    if fields:
+        projection = {field: 1 for field in fields}
+        projection[key] = 1
+
+    docs = list(collection.find(query, projection).sort([(key, direction), ("_id", direction)]).limit(limit + 1))
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1].get(key), docs[-1]["_id"])
+
+    for doc in docs:
+        doc.pop("_id", None)
+        if fields and key not in fields:
+            doc.pop(key, None)
+
+    return docs, next_cursor
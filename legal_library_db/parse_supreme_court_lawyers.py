@@ -100,21 +100,6 @@ def get_coordinates_for_city(city):
     }
     return coordinates.get(city, (28.6139, 77.2090))
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points in kilometers"""
-    from math import radians, cos, sin, asin, sqrt
-    
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    r = 6371  # Radius of earth in kilometers
-    return c * r
-
 def parse_lawyer_text(text_content):
     """Parse the Supreme Court lawyer text and extract structured data"""
     lawyers = []
@@ -240,6 +225,7 @@ def parse_lawyer_text(text_content):
             
             # Determine city from address
             city = extract_city_from_address(clean_address)
+            latitude, longitude = get_coordinates_for_city(city)
             
             # Create clean email from name
             name_for_email = clean_name.replace('Sh ', '').replace('Ms. ', '').replace('Dr. ', '').replace('Smt. ', '').replace('Miss ', '')
@@ -259,8 +245,9 @@ def parse_lawyer_text(text_content):
                 "senior_advocate": is_senior,
                 "experience": experience,
                 "photoUrl": "https://via.placeholder.com/150",
-                "latitude": get_coordinates_for_city(city)[0],
-                "longitude": get_coordinates_for_city(city)[1],
+                "latitude": latitude,
+                "longitude": longitude,
+                "location": {"type": "Point", "coordinates": [longitude, latitude]},
                 "fee": f"₹{random.randint(1000, 5000)}/hr",
                 "description": f"Experienced advocate practicing {random.choice(expertise_areas).lower()} with {experience}+ years of experience",
                 "phone": phone or f"+91-{random.randint(7000000000, 9999999999)}",
@@ -299,6 +286,8 @@ def upload_to_mongodb(lawyers, collection):
             if lawyers:
                 result = collection.insert_many(lawyers)
                 print(f"✅ Successfully uploaded {len(result.inserted_ids)} lawyers to MongoDB")
+                collection.create_index([("location", "2dsphere"), ("expertise", 1)])
+                print("✅ Created 2dsphere index on lawyer locations")
                 return True
             else:
                 print("❌ No lawyer data to upload")
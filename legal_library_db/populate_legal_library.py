@@ -3,11 +3,21 @@ import json
 from pymongo import MongoClient
 from datetime import datetime
 import os
+import re
+import time
+from difflib import get_close_matches
 from dotenv import load_dotenv
+from geopy.geocoders import Nominatim
+from fir_store import ensure_fir_indexes, ensure_stats_indexes
 
 # Load environment variables
 load_dotenv()
 
+# Bundled district centres keyed by "district, state" (see its "source" field), so
+# a fresh deploy has the offline reverse geocoder without any network calls;
+# districts it misses are geocoded once and added to it
+CENTROIDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "district_centroids.json")
+
 def connect_to_mongodb():
     """Connect to MongoDB Atlas"""
     try:
@@ -127,6 +137,74 @@ def populate_states_and_districts(db):
         return False
 
 
+def centroid_key(district_name, state_name):
+    """'North 24 Parganas', 'West Bengal' -> 'north 24 parganas, west bengal'; '(UT)' style notes are dropped"""
+    def clean(name):
+        return " ".join(re.sub(r"[^a-z0-9]+", " ", re.sub(r"\(.*?\)", "", name.lower())).split())
+    return f"{clean(district_name)}, {clean(state_name)}"
+
+def load_centroids():
+    with open(CENTROIDS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_centroids(bundle):
+    # One district per line keeps diffs of the bundled file readable
+    lines = ",\n".join(f"  {json.dumps(key)}: [{lat}, {lng}]" for key, (lat, lng) in sorted(bundle["districts"].items()))
+    with open(CENTROIDS_FILE, "w", encoding="utf-8") as f:
+        f.write(f'{{\n "source": {json.dumps(bundle["source"])},\n "districts": {{\n{lines}\n }}\n}}\n')
+
+def match_centroid(centroids, district):
+    """Exact name match first, then the closest spelling within the same state"""
+    key = centroid_key(district['name'], district['state_name'])
+    if key in centroids:
+        return centroids[key]
+    district_part, state_part = key.rsplit(", ", 1)
+    same_state = {k.rsplit(", ", 1)[0]: k for k in centroids if k.endswith(f", {state_part}")}
+    close = get_close_matches(district_part, list(same_state), n=1, cutoff=0.8)
+    return centroids[same_state[close[0]]] if close else None
+
+def populate_district_centroids(db, delay=1.0, geocode_missing=True):
+    """Store a centre point on every district for the app's offline reverse geocoder"""
+    try:
+        bundle = load_centroids()
+        centroids = bundle["districts"]
+        print(f"📂 Loaded {len(centroids)} district centroids from {os.path.basename(CENTROIDS_FILE)}")
+
+        districts = list(db.districts.find({}, {"_id": 0, "code": 1, "name": 1, "state_name": 1}))
+        located, missing = 0, []
+        for district in districts:
+            point = match_centroid(centroids, district)
+            if point:
+                db.districts.update_one({"code": district['code']}, {"$set": {"latitude": point[0], "longitude": point[1]}})
+                located += 1
+            else:
+                missing.append(district)
+
+        if missing and geocode_missing:
+            print(f"🌍 Geocoding {len(missing)} districts missing from the bundle with Nominatim (1 request/second)...")
+            geolocator = Nominatim(user_agent="law_app")
+            for district in missing:
+                # "Delhi (NCT)" -> "Delhi"
+                state_name = re.sub(r"\s*\(.*?\)", "", district['state_name'])
+                try:
+                    location = geolocator.geocode(f"{district['name']}, {state_name}, India", timeout=10)
+                    if location:
+                        lat, lng = round(location.latitude, 4), round(location.longitude, 4)
+                        centroids[centroid_key(district['name'], district['state_name'])] = [lat, lng]
+                        db.districts.update_one({"code": district['code']}, {"$set": {"latitude": lat, "longitude": lng}})
+                        located += 1
+                except Exception as e:
+                    print(f"⚠️ Could not geocode {district['name']}: {e}")
+                time.sleep(delay)
+            save_centroids(bundle)
+
+        print(f"✅ {located} of {len(districts)} districts have centroids")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error locating district centroids: {e}")
+        return False
+
 def populate_police_stations(db):
     """Generate comprehensive police stations for all districts"""
     try:
@@ -180,9 +258,10 @@ def populate_police_stations(db):
                     "created_at": datetime.now()
                 })
         
-        # Clear existing data and insert new
+        # Clear existing generated data and insert new; stations loaded by
+        # import_police_stations.py from an OSM extract are kept
         print("🗑️ Clearing existing police stations data...")
-        db.police_stations.delete_many({})
+        db.police_stations.delete_many({"source": {"$ne": "openstreetmap"}})
         
         print("📝 Inserting police stations data...")
         db.police_stations.insert_many(police_stations_data)
@@ -212,12 +291,25 @@ def create_indexes(db):
         db.police_stations.create_index("district_code")
         db.police_stations.create_index("state_code")
         db.police_stations.create_index("code")
+        db.police_stations.create_index([("location", "2dsphere")])
         
         # FIR records indexes
-        db.fir_records.create_index("fir_id")
-        db.fir_records.create_index([("created_at", -1)])
-        db.fir_records.create_index("state_code")
-        db.fir_records.create_index("district_code")
+        ensure_fir_indexes(db.fir_records)
+        ensure_stats_indexes(db.fir_stats)
+        
+        # Legal content keyset pagination indexes (sort key + _id tie-breaker)
+        db.acts.create_index([("act_id", 1), ("_id", 1)])
+        db.articles.create_index([("article_number", 1), ("_id", 1)])
+        db.cases.create_index([("title", 1), ("_id", 1)])
+        db.lawyers.create_index([("enrollment_number", 1), ("_id", 1)])
+
+        # Nearby lawyer search: backfill GeoJSON points for lawyers stored before
+        # the location field existed, then index them
+        db.lawyers.update_many(
+            {"location": {"$exists": False}, "latitude": {"$type": "number"}, "longitude": {"$type": "number"}},
+            [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}],
+        )
+        db.lawyers.create_index([("location", "2dsphere"), ("expertise", 1)])
         
         print("✅ Database indexes created successfully")
         
@@ -295,18 +387,23 @@ def main():
         print("❌ Failed to populate states and districts")
         return
     
+    # Locate district centroids
+    print("\n🌍 Step 2: Locating District Centroids")
+    if not populate_district_centroids(db):
+        print("⚠️ Continuing without district centroids; reverse geocoding will use Nominatim")
+
     # Populate police stations
-    print("\n🚔 Step 2: Populating Police Stations")
+    print("\n🚔 Step 3: Populating Police Stations")
     if not populate_police_stations(db):
         print("❌ Failed to populate police stations")
         return
     
     # Create indexes
-    print("\n⚡ Step 3: Creating Database Indexes")
+    print("\n⚡ Step 4: Creating Database Indexes")
     create_indexes(db)
     
     # Verify data
-    print("\n🔍 Step 4: Verifying Data")
+    print("\n🔍 Step 5: Verifying Data")
     verify_data(db)
     
     print("\n" + "=" * 60)
@@ -316,6 +413,7 @@ def main():
     print("1. Update your Flutter app backend URL")
     print("2. Test the cascading dropdowns in your FIR screen")
     print("3. Run your Flutter app and test the File FIR feature")
+    print("4. Run check_fir_plans.py to confirm the FIR listing queries use their indexes")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,33 @@
+"""Recompute the FIR rollups in fir_stats from fir_records.
+
+The app keeps the rollups current as FIRs are created; run this after
+importing or deleting FIRs directly in the database, or if the app logged
+that a rollup update failed. It first converts created_at values that older
+versions stored as strings to UTC dates, so listing and rollups see one type:
+
+    cd legal_library_db && python rebuild_fir_stats.py
+"""
+from pymongo import MongoClient
+from dotenv import load_dotenv
+import os
+import time
+
+from fir_store import normalize_created_at, rebuild_fir_stats
+
+# Load .env file to get MONGO_URI
+load_dotenv()
+
+def connect_to_mongodb():
+    client = MongoClient(os.getenv("MONGO_URI"))
+    return client["legal_library"]
+
+if __name__ == "__main__":
+    db = connect_to_mongodb()
+    started = time.time()
+    converted, unparseable = normalize_created_at(db.fir_records)
+    if converted or unparseable:
+        print(f"🕒 Converted {converted} string created_at values to dates"
+              + (f"; ⚠️ {unparseable} could not be parsed and were left as strings" if unparseable else ""))
+    buckets = rebuild_fir_stats(db.fir_records, db.fir_stats)
+    print(f"✅ Rebuilt {buckets} FIR stats buckets from {db.fir_records.estimated_document_count()} FIRs "
+          f"in {time.time() - started:.1f}s")
@@ -0,0 +1,343 @@
+"""BM25 full-text index over act sections, stored in MongoDB.
+
+The index is built by import_to_mongo.py and queried by the /acts/search
+route. Postings are grouped per act: each (term, act) owns one or more posting
+chunks in `search_terms`, so a query only reads the postings of its own terms
+and never scans the sections, and re-importing an act only rewrites that act's
+chunks. `search_meta` holds the corpus totals BM25 needs plus one totals
+document per act, which lets an update subtract what the old version added.
+"""
+import heapq
+import math
+import re
+import sys
+import time
+from array import array
+from datetime import datetime
+
+from bson.binary import Binary
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the
+this to was were which with
+""".split())
+
+K1 = 1.2
+B = 0.75
+CHUNK_SIZE = 5000
+INSERT_BATCH = 1000
+SNIPPET_TOKENS = 30
+
+SECTIONS = "act_sections"
+TERMS = "search_terms"
+META = "search_meta"
+# Bumped when the stored layout changes; an index in another format is rebuilt
+INDEX_FORMAT = 2
+
+
+def token_spans(text):
+    """Yield (position, start, end, term) for every indexable token in text"""
+    for pos, match in enumerate(TOKEN_RE.finditer(text.lower())):
+        term = match.group()
+        if term not in STOPWORDS:
+            yield pos, match.start(), match.end(), term
+
+
+def tokenize(text):
+    """Return (position, term) pairs; stopwords are dropped but keep their slot"""
+    return [(pos, term) for pos, _, _, term in token_spans(text)]
+
+
+def _pack(positions):
+    if sys.byteorder != "little":
+        positions.byteswap()
+    return Binary(positions.tobytes())
+
+
+def _unpack(blob):
+    positions = array("I")
+    positions.frombytes(blob)
+    if sys.byteorder != "little":
+        positions.byteswap()
+    return positions
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# INDEX BUILD
+# ────────────────────────────────────────────────────────────────────────────────
+
+class IndexBuilder:
+    """Accumulates section postings per act in memory and writes them to MongoDB"""
+
+    def __init__(self):
+        self.postings = {}
+        self.act_totals = {}
+
+    def add(self, doc_id, act_id, text):
+        positions = {}
+        for pos, term in tokenize(text):
+            positions.setdefault(term, array("I")).append(pos)
+        length = sum(len(p) for p in positions.values())
+
+        for term, term_positions in positions.items():
+            docs, lens, pos = self.postings.setdefault((term, act_id), ([], [], []))
+            docs.append(doc_id)
+            lens.append(length)
+            pos.append(term_positions)
+
+        totals = self.act_totals.setdefault(act_id, {"doc_count": 0, "total_length": 0})
+        totals["doc_count"] += 1
+        totals["total_length"] += length
+
+    @property
+    def doc_count(self):
+        return sum(totals["doc_count"] for totals in self.act_totals.values())
+
+    @property
+    def total_length(self):
+        return sum(totals["total_length"] for totals in self.act_totals.values())
+
+    def _term_chunks(self):
+        for (term, act_id), (docs, lens, pos) in self.postings.items():
+            for chunk, start in enumerate(range(0, len(docs), CHUNK_SIZE)):
+                end = start + CHUNK_SIZE
+                yield {
+                    "term": term,
+                    "act_id": act_id,
+                    "chunk": chunk,
+                    "docs": docs[start:end],
+                    "lens": lens[start:end],
+                    "tfs": [len(p) for p in pos[start:end]],
+                    "pos": [_pack(p) for p in pos[start:end]],
+                }
+
+    def insert_chunks(self, collection):
+        batch = []
+        for chunk in self._term_chunks():
+            batch.append(chunk)
+            if len(batch) >= INSERT_BATCH:
+                collection.insert_many(batch)
+                batch = []
+        if batch:
+            collection.insert_many(batch)
+
+    def act_meta(self):
+        return [{"_id": f"act:{act_id}", **totals} for act_id, totals in self.act_totals.items()]
+
+    def write(self, db):
+        """Write the index into staging collections, then swap them in atomically"""
+        staged = {name: db[f"{name}_build"] for name in (TERMS, META)}
+        for collection in staged.values():
+            collection.drop()
+
+        self.insert_chunks(staged[TERMS])
+        staged[META].insert_one(corpus_meta(self.doc_count, self.total_length))
+        if self.act_totals:
+            staged[META].insert_many(self.act_meta())
+
+        ensure_term_indexes(staged[TERMS])
+
+        for name, collection in staged.items():
+            collection.rename(name, dropTarget=True)
+
+        return self.doc_count, len({term for term, _ in self.postings})
+
+
+def corpus_meta(doc_count, total_length):
+    return {
+        "_id": "acts",
+        "format": INDEX_FORMAT,
+        "doc_count": doc_count,
+        "total_length": total_length,
+        "avg_length": total_length / doc_count if doc_count else 0.0,
+        "built_at": datetime.now(),
+    }
+
+
+def ensure_term_indexes(collection):
+    collection.create_index([("term", 1), ("act_id", 1), ("chunk", 1)])
+    collection.create_index("act_id")
+
+
+def build_search_index(db):
+    """Index every document in act_sections; postings refer to section _ids"""
+    builder = IndexBuilder()
+    for section in db[SECTIONS].find({}, {"act_id": 1, "title": 1, "content": 1}):
+        builder.add(section["_id"], section["act_id"], f"{section.get('title', '')}\n{section.get('content', '')}")
+    return builder.write(db)
+
+
+def update_search_index(db, act_ids):
+    """Re-index only these acts (changed, new or removed); writes scale with their size.
+
+    Falls back to a full build when there is no index yet or it was written in
+    an older format. Returns (sections indexed, posting lists written).
+    """
+    meta = db[META].find_one({"_id": "acts"})
+    if not meta or meta.get("format") != INDEX_FORMAT:
+        return build_search_index(db)
+
+    act_ids = [str(act_id) for act_id in set(act_ids)]
+    old = list(db[META].find({"_id": {"$in": [f"act:{act_id}" for act_id in act_ids]}}))
+    removed_docs = sum(totals["doc_count"] for totals in old)
+    removed_length = sum(totals["total_length"] for totals in old)
+
+    builder = IndexBuilder()
+    for section in db[SECTIONS].find({"act_id": {"$in": act_ids}}, {"act_id": 1, "title": 1, "content": 1}):
+        builder.add(section["_id"], section["act_id"], f"{section.get('title', '')}\n{section.get('content', '')}")
+
+    db[TERMS].delete_many({"act_id": {"$in": act_ids}})
+    db[META].delete_many({"_id": {"$in": [totals["_id"] for totals in old]}})
+    builder.insert_chunks(db[TERMS])
+    if builder.act_totals:
+        db[META].insert_many(builder.act_meta())
+
+    doc_count = meta["doc_count"] - removed_docs + builder.doc_count
+    total_length = meta["total_length"] - removed_length + builder.total_length
+    db[META].replace_one({"_id": "acts"}, corpus_meta(doc_count, total_length))
+    return builder.doc_count, len(builder.postings)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# QUERY
+# ────────────────────────────────────────────────────────────────────────────────
+
+def parse_query(query):
+    """Split a query into loose terms and quoted phrases of (offset, term)"""
+    phrases = []
+    for match in PHRASE_RE.finditer(query):
+        tokens = tokenize(match.group(1))
+        if tokens:
+            first = tokens[0][0]
+            phrases.append([(pos - first, term) for pos, term in tokens])
+
+    loose = [term for _, term in tokenize(PHRASE_RE.sub(" ", query))]
+    return list(dict.fromkeys(loose)), phrases
+
+
+def _load_postings(db, terms, with_positions):
+    postings = {}
+    if not terms:
+        return postings
+
+    projection = {"_id": 0, "term": 1, "docs": 1, "lens": 1, "tfs": 1}
+    if with_positions:
+        projection["pos"] = 1
+
+    # A term's postings are spread over one chunk list per act; df is their total
+    for chunk in db[TERMS].find({"term": {"$in": list(terms)}}, projection):
+        entry = postings.setdefault(chunk["term"], {"df": 0, "docs": {}})
+        entry["df"] += len(chunk["docs"])
+        positions = chunk.get("pos") or [None] * len(chunk["docs"])
+        for doc_id, length, tf, pos in zip(chunk["docs"], chunk["lens"], chunk["tfs"], positions):
+            entry["docs"][doc_id] = (length, tf, pos)
+    return postings
+
+
+def _phrase_matches(phrase, postings, doc_id):
+    offsets = []
+    for offset, term in phrase:
+        entry = postings.get(term)
+        if not entry or doc_id not in entry["docs"]:
+            return False
+        offsets.append((offset, set(_unpack(entry["docs"][doc_id][2]))))
+
+    first_offset, first_positions = offsets[0]
+    for start in first_positions:
+        base = start - first_offset
+        if all(base + offset in positions for offset, positions in offsets[1:]):
+            return True
+    return False
+
+
+def make_snippet(text, terms):
+    """Return a short window of text around the first hit, with hits in <mark>"""
+    spans = list(token_spans(text))
+    hits = [i for i, span in enumerate(spans) if span[3] in terms]
+    if not hits:
+        return text[:200]
+
+    first = max(0, hits[0] - SNIPPET_TOKENS // 4)
+    window = spans[first:first + SNIPPET_TOKENS]
+    start, end = window[0][1], window[-1][2]
+
+    pieces, cursor = [], start
+    for _, token_start, token_end, term in window:
+        if term in terms:
+            pieces.append(text[cursor:token_start])
+            pieces.append(f"<mark>{text[token_start:token_end]}</mark>")
+            cursor = token_end
+    pieces.append(text[cursor:end])
+
+    snippet = "".join(pieces).replace("\n", " ")
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return f"{prefix}{snippet}{suffix}"
+
+
+def search_sections(db, query, k=10):
+    """Rank sections for a query with BM25; quoted phrases must match exactly"""
+    started = time.perf_counter()
+    loose, phrases = parse_query(query)
+    phrase_terms = {term for phrase in phrases for _, term in phrase}
+    all_terms = set(loose) | phrase_terms
+
+    result = {"query": query, "total_hits": 0, "results": []}
+    meta = db[META].find_one({"_id": "acts"})
+    if not all_terms or not meta or not meta["doc_count"]:
+        result["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    postings = _load_postings(db, phrase_terms, with_positions=True)
+    postings.update(_load_postings(db, all_terms - phrase_terms, with_positions=False))
+
+    doc_count, avg_length = meta["doc_count"], meta["avg_length"] or 1.0
+    scores = {}
+    for term in all_terms:
+        entry = postings.get(term)
+        if not entry:
+            continue
+        df = entry["df"]
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        for doc_id, (length, tf, _) in entry["docs"].items():
+            norm = K1 * (1 - B + B * length / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+    if phrases:
+        scores = {
+            doc_id: score for doc_id, score in scores.items()
+            if all(_phrase_matches(phrase, postings, doc_id) for phrase in phrases)
+        }
+
+    top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+    sections = {
+        section["_id"]: section
+        for section in db[SECTIONS].find({"_id": {"$in": [doc_id for doc_id, _ in top]}})
+    }
+    act_names = {
+        act["act_id"]: act.get("act_name", "")
+        for act in db.acts.find(
+            {"act_id": {"$in": list({s["act_id"] for s in sections.values()})}},
+            {"_id": 0, "act_id": 1, "act_name": 1},
+        )
+    }
+
+    for doc_id, score in top:
+        section = sections.get(doc_id)
+        if not section:
+            continue
+        result["results"].append({
+            "act_id": section["act_id"],
+            "act_name": act_names.get(section["act_id"], ""),
+            "section_number": section["section_number"],
+            "title": section["title"],
+            "score": round(score, 4),
+            "snippet": make_snippet(section["content"], all_terms),
+        })
+
+    result["total_hits"] = len(scores)
+    result["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
@@ -0,0 +1,416 @@
+"""Police station and district lookups shared by the app and the nightly jobs.
+
+Geocoding goes to Nominatim and station searches to Overpass, each behind a
+read-through cache, a rate limiter and a circuit breaker. Nothing here imports
+Flask, so warm_district_stations.py can refresh district lists without
+starting the web app, Firebase or the email worker.
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from functools import partial
+
+from geopy.adapters import RequestsAdapter
+from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+from geopy.geocoders import Nominatim
+
+from cache import ReadThroughCache
+from database import db
+from geo import NearestCentroidIndex, covering_geohashes, geohash_bbox, geohash_encode, nearest_k, normalize_place
+from upstream import (
+    USER_AGENT, CallTimer, CircuitBreaker, HedgedPoster, TokenBucket, deadline_passed, make_session, time_left,
+)
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_TTL = 30 * 86400
+REVERSE_GEOHASH_PRECISION = 6
+
+geo_cache_collection = db.geo_cache if db is not None else None
+forward_geocode_cache = ReadThroughCache("forward", geo_cache_collection, ttl=GEOCODE_TTL)
+reverse_geocode_cache = ReadThroughCache("reverse", geo_cache_collection, ttl=GEOCODE_TTL)
+
+# Outbound rate limits per upstream (per app process). Nominatim's usage policy
+# allows at most 1 request/second; callers wait up to UPSTREAM_QUEUE_SECONDS for
+# a slot and otherwise give up as if the lookup had failed.
+UPSTREAM_QUEUE_SECONDS = float(os.getenv("UPSTREAM_QUEUE_SECONDS", 5))
+nominatim_limiter = TokenBucket("nominatim", rate=float(os.getenv("NOMINATIM_RATE", 1)), burst=1)
+overpass_limiter = TokenBucket("overpass", rate=float(os.getenv("OVERPASS_RATE", 1)), burst=2)
+
+# One long-lived client per upstream: the Nominatim geocoder keeps its pooled
+# keep-alive session and Overpass calls share one session across mirrors
+nominatim = Nominatim(
+    user_agent=USER_AGENT, timeout=5,
+    adapter_factory=partial(RequestsAdapter, pool_connections=1, pool_maxsize=8, max_retries=1),
+)
+overpass_session = make_session(pool_size=8)
+nominatim_timer = CallTimer("nominatim")
+overpass_timer = CallTimer("overpass")
+
+# Circuit breakers: once half of the recent calls to an upstream fail, callers
+# get their fallback immediately until a probe 30 s later succeeds
+nominatim_breaker = CircuitBreaker("nominatim")
+overpass_breaker = CircuitBreaker("overpass")
+
+def upstream_slot(breaker, limiter, what):
+    """Admit one call past the upstream's circuit breaker and rate limiter"""
+    if deadline_passed():
+        logger.debug(f"request deadline passed: skipped {what}")
+        return False
+    if not breaker.allow():
+        logger.debug(f"{breaker.name} circuit open: skipped {what}")
+        return False
+    if not limiter.acquire(timeout=time_left(UPSTREAM_QUEUE_SECONDS, floor=0)):
+        breaker.release()
+        logger.warning(f"{limiter.name} rate limit: skipped {what}")
+        return False
+    return True
+
+def upstream_failed(breaker, error):
+    """Record a failed call, unless it only timed out because its request's deadline was cut short"""
+    if deadline_passed():
+        breaker.release()
+    else:
+        breaker.record_failure(error)
+
+# District centroids (filled in by populate_legal_library.py) back the offline
+# reverse geocoder; loaded once on first use, and looked for again every minute
+# while the districts have none yet
+DISTRICT_MATCH_MAX_KM = 150
+DISTRICT_INDEX_RETRY_SECONDS = 60
+district_index = None
+district_index_checked_at = 0.0
+
+# Overpass results are cached per geohash tile; stale tiles are served at once and
+# refreshed in the background, so only a cold tile ever waits on Overpass
+OVERPASS_URLS = [
+    url.strip() for url in os.getenv(
+        "OVERPASS_URLS",
+        "http://overpass-api.de/api/interpreter,https://overpass.kumi.systems/api/interpreter",
+    ).split(",") if url.strip()
+]
+OVERPASS_TILE_PRECISION = 4
+OVERPASS_TILE_TTL = 7 * 86400
+OVERPASS_TILE_STALE_TTL = 60 * 86400
+STATION_SEARCH_RADIUS_KM = 15
+MAX_NEARBY_STATIONS = 15
+
+# Query planner: (radius_km, geohash precision) steps tried in order until the
+# radius holds MAX_NEARBY_STATIONS stations. Dense cities stop at the ~5 km
+# tiles of the first step; rural areas still get the full 15 km.
+OVERPASS_SEARCH_PLAN = [(5, 5), (STATION_SEARCH_RADIUS_KM, OVERPASS_TILE_PRECISION)]
+MAX_TILES_PER_QUERY = 64
+
+# Overpass mirrors are interchangeable: a call slower than the current mirror's
+# p95 is repeated on the next one and the first answer wins
+overpass_poster = HedgedPoster("overpass", OVERPASS_URLS, session=overpass_session)
+
+overpass_tile_cache = ReadThroughCache(
+    "overpass_tile", geo_cache_collection,
+    ttl=OVERPASS_TILE_TTL, stale_ttl=OVERPASS_TILE_STALE_TTL, max_entries=512,
+)
+
+def geocode_district(state_name, district_name):
+    """Live Nominatim lookup; returns None on failure so the result is not cached"""
+    if not upstream_slot(nominatim_breaker, nominatim_limiter, f"geocoding {district_name}"):
+        return None
+    try:
+        with nominatim_timer.time():
+            location = nominatim.geocode(f"{district_name}, {state_name}, India", timeout=time_left(5))
+        nominatim_breaker.record_success()
+        
+        if location:
+            return {
+                'lat': location.latitude,
+                'lng': location.longitude
+            }
+        return None
+    except Exception as e:
+        upstream_failed(nominatim_breaker, e)
+        logger.error(f"Geocoding error: {e}")
+        return None
+
+def get_district_coordinates(state_name, district_name):
+    """Get latitude and longitude for a district"""
+    return forward_geocode_cache.get(
+        normalize_place(district_name, state_name),
+        lambda: geocode_district(state_name, district_name)
+    )
+
+def fallback_police_stations(district_name):
+    """Single generic station used when no real stations can be found"""
+    return [
+        {
+            'code': f"PS_MAIN_{district_name.replace(' ', '_').upper()}",
+            'name': f"{district_name} Main Police Station",
+            'distance_km': 0.0,
+            'address': f"Main area, {district_name}",
+            'phone': '',
+            'source': 'fallback'
+        }
+    ]
+
+
+def fetch_overpass_tiles(tiles):
+    """Fetch police stations for several geohash tiles in one Overpass query"""
+    if not upstream_slot(overpass_breaker, overpass_limiter, f"fetching {len(tiles)} tiles"):
+        return {}
+    try:
+        boxes = "\n".join(
+            '          nwr["amenity"="police"]({0},{1},{2},{3});'.format(*geohash_bbox(tile))
+            for tile in tiles
+        )
+        overpass_query = f"""
+        [out:json][timeout:25];
+        (
+{boxes}
+        );
+        out tags center qt;
+        """
+
+        with overpass_timer.time():
+            data = json.loads(overpass_poster.post(overpass_query, timeout=time_left(30)))
+        overpass_breaker.record_success()
+    except Exception as e:
+        upstream_failed(overpass_breaker, e)
+        logger.error(f"Overpass tile fetch error: {e}")
+        return {}
+
+    stations = {tile: [] for tile in tiles}
+    precisions = {len(tile) for tile in tiles}
+    for element in data.get('elements', []):
+        # Get coordinates
+        if 'lat' in element and 'lon' in element:
+            station_lat, station_lon = element['lat'], element['lon']
+        elif 'center' in element:
+            station_lat, station_lon = element['center']['lat'], element['center']['lon']
+        else:
+            continue
+
+        # Ways and relations are filed under the tile holding their centre
+        tags = element.get('tags', {})
+        for precision in precisions:
+            tile = geohash_encode(station_lat, station_lon, precision)
+            if tile in stations:
+                stations[tile].append({
+                    'id': element.get('id'),
+                    'lat': station_lat,
+                    'lon': station_lon,
+                    'name': tags.get('name', ''),
+                    'street': tags.get('addr:street', ''),
+                    'city': tags.get('addr:city', ''),
+                    'phone': tags.get('phone', ''),
+                })
+
+    logger.info(f"🗺️ Fetched {sum(len(v) for v in stations.values())} stations for {len(tiles)} Overpass tiles")
+    return stations
+
+
+def unnamed_station_name(district_name):
+    """Placeholder for stations without a name; blank while the district is still unknown"""
+    return f'Police Station near {district_name}' if district_name else ''
+
+
+def find_local_police_stations(lat, lng, district_name=None):
+    """Nearest stations from the imported OSM extract, answered by the 2dsphere index"""
+    if db is None:
+        return []
+    try:
+        pipeline = [
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [lng, lat]},
+                "distanceField": "distance_m",
+                "maxDistance": STATION_SEARCH_RADIUS_KM * 1000,
+                "query": {"source": "openstreetmap"},
+                "spherical": True,
+            }},
+            {"$limit": MAX_NEARBY_STATIONS},
+            {"$project": {"_id": 0, "code": 1, "name": 1, "location": 1, "distance_m": 1, "address": 1, "phone": 1}},
+        ]
+        return [
+            {
+                'code': station['code'],
+                'name': station.get('name') or unnamed_station_name(district_name),
+                'latitude': station['location']['coordinates'][1],
+                'longitude': station['location']['coordinates'][0],
+                'distance_km': round(station['distance_m'] / 1000, 2),
+                'address': station.get('address', ''),
+                'phone': station.get('phone', ''),
+                'source': 'openstreetmap'
+            }
+            for station in db.police_stations.aggregate(pipeline)
+        ]
+    except Exception as e:
+        logger.warning(f"Local police station lookup failed: {e}")
+        return []
+
+
+def search_overpass_stations(points, district_name=None):
+    """Nearest Overpass stations for each (lat, lng); every tile is fetched at most once.
+
+    Returns one station list per point, or None where no tile could be loaded.
+    """
+    results = [None] * len(points)
+    remaining = list(range(len(points)))
+    for radius_km, precision in OVERPASS_SEARCH_PLAN:
+        point_tiles = {i: covering_geohashes(points[i][0], points[i][1], radius_km, precision) for i in remaining}
+        wanted = list(dict.fromkeys(tile for tiles in point_tiles.values() for tile in tiles))
+        tile_stations = {}
+        for start in range(0, len(wanted), MAX_TILES_PER_QUERY):
+            tile_stations.update(overpass_tile_cache.get_many(wanted[start:start + MAX_TILES_PER_QUERY], fetch_overpass_tiles))
+
+        widen = []
+        for i in remaining:
+            tiles = point_tiles[i]
+            if not any(tile in tile_stations for tile in tiles):
+                continue
+
+            # Rank every candidate in one vectorized pass and keep the closest 15
+            lat, lng = points[i]
+            candidates = [s for tile in tiles for s in tile_stations.get(tile, [])]
+            order, distances = nearest_k(
+                lat, lng,
+                [station['lat'] for station in candidates],
+                [station['lon'] for station in candidates],
+                MAX_NEARBY_STATIONS, max_km=radius_km,
+            )
+            results[i] = [
+                {
+                    'code': f"PS_{candidates[j]['id'] or j}",
+                    'name': candidates[j]['name'] or unnamed_station_name(district_name),
+                    'latitude': candidates[j]['lat'],
+                    'longitude': candidates[j]['lon'],
+                    'distance_km': round(float(distance), 2),
+                    'address': f"{candidates[j]['street']} {candidates[j]['city']}".strip(),
+                    'phone': candidates[j]['phone'],
+                    'source': 'openstreetmap'
+                }
+                for j, distance in zip(order.tolist(), distances)
+            ]
+            if len(order) < MAX_NEARBY_STATIONS:
+                widen.append(i)
+
+        remaining = widen
+        if not remaining:
+            break
+    return results
+
+
+def search_nearby_police_stations_batch(points, district_name=None):
+    """Station lists for many (lat, lng) points: local index first, shared Overpass tiles after"""
+    results = [find_local_police_stations(lat, lng, district_name) for lat, lng in points]
+
+    # Areas the local extract does not cover fall back to OpenStreetMap Overpass
+    pending = [i for i, stations in enumerate(results) if not stations]
+    if pending:
+        try:
+            found = search_overpass_stations([points[i] for i in pending], district_name)
+        except Exception as e:
+            logger.error(f"Police station search error: {e}")
+            found = [None] * len(pending)
+        for i, stations in zip(pending, found):
+            results[i] = stations
+    return results
+
+
+def search_nearby_police_stations(lat, lng, district_name=None):
+    """Search for police stations in the local index, then in cached Overpass tiles.
+
+    Without a district_name, unnamed stations get a blank name and a failed
+    search returns None instead of the fallback station.
+    """
+    stations = search_nearby_police_stations_batch([(lat, lng)], district_name)[0]
+    if stations is None and district_name:
+        # Fallback to a few generic stations if API fails
+        return fallback_police_stations(district_name)
+    return stations
+
+
+def reverse_geocode(lat, lng):
+    """Live Nominatim reverse lookup; returns None on failure so the result is not cached"""
+    if not upstream_slot(nominatim_breaker, nominatim_limiter, f"reverse geocoding {lat}, {lng}"):
+        return None
+    try:
+        with nominatim_timer.time():
+            location = nominatim.reverse(f"{lat}, {lng}", timeout=time_left(5))
+        nominatim_breaker.record_success()
+        if location and location.raw.get('address'):
+            address = location.raw['address']
+            return {
+                'district': address.get('state_district', address.get('county', 'Unknown')),
+                'state': address.get('state', 'Unknown')
+            }
+    except (GeocoderTimedOut, GeocoderUnavailable, Exception) as e:
+        upstream_failed(nominatim_breaker, e)
+        logger.error(f"Reverse geocoding error: {e}")
+    return None
+
+def load_district_index():
+    """Build the in-process nearest-district index from the centroids stored on districts"""
+    global district_index, district_index_checked_at
+    if district_index is None and db is not None and time.monotonic() - district_index_checked_at >= DISTRICT_INDEX_RETRY_SECONDS:
+        district_index_checked_at = time.monotonic()
+        try:
+            index = NearestCentroidIndex(
+                (d['latitude'], d['longitude'], {'district': d['name'], 'state': d['state_name']})
+                for d in db.districts.find(
+                    {"latitude": {"$type": "number"}, "longitude": {"$type": "number"}},
+                    {"_id": 0, "name": 1, "state_name": 1, "latitude": 1, "longitude": 1},
+                )
+            )
+            if len(index):
+                district_index = index
+                logger.info(f"🗺️ Loaded {len(district_index)} district centroids for offline reverse geocoding")
+            else:
+                logger.warning("⚠️ No district centroids yet; run populate_legal_library.py")
+        except Exception as e:
+            logger.error(f"District centroid load error: {e}")
+    return district_index
+
+def get_area_from_coordinates(lat, lng):
+    """Get district/state information from coordinates with fallback"""
+    # Nearest district centroid answers offline; Nominatim only covers points with no district nearby
+    index = load_district_index()
+    match = index.nearest(lat, lng, max_km=DISTRICT_MATCH_MAX_KM) if index else None
+    if match:
+        return dict(match[0])
+
+    # Every point in the same geohash cell shares one cached answer
+    cell = geohash_encode(lat, lng, REVERSE_GEOHASH_PRECISION)
+    area = reverse_geocode_cache.get(cell, lambda: reverse_geocode(lat, lng))
+    
+    # Fallback to default values
+    return area or {'district': 'Unknown', 'state': 'Unknown'}
+
+def refresh_district_stations(district):
+    """Rank the stations around a district's centre and store them in district_stations.
+
+    Returns the stored document, or None if the centre or the stations could not
+    be resolved (the previous document, if any, is kept).
+    """
+    if district.get('latitude') is not None and district.get('longitude') is not None:
+        district_coords = {'lat': district['latitude'], 'lng': district['longitude']}
+    else:
+        district_coords = get_district_coordinates(district['state_name'], district['name'])
+    if not district_coords:
+        logger.warning(f"Could not get coordinates for {district['name']}")
+        return None
+
+    stations = search_nearby_police_stations_batch(
+        [(district_coords['lat'], district_coords['lng'])], district['name']
+    )[0]
+    if stations is None:
+        return None
+
+    doc = {
+        "_id": district['code'],
+        "district_name": district['name'],
+        "state_code": district.get('state_code'),
+        "center": district_coords,
+        "stations": stations,
+        "computed_at": datetime.utcnow(),
+    }
+    db.district_stations.replace_one({"_id": district['code']}, doc, upsert=True)
+    return doc
@@ -0,0 +1,497 @@
+"""Guards for calls to third-party services (Nominatim, Overpass).
+
+Each upstream gets a token bucket so bursts of requests are spread out to the
+rate the service allows instead of being sent at once and throttled, and a
+circuit breaker so an outage fails fast instead of holding every worker for
+the full request timeout. HedgedPoster spreads a call over several equivalent
+endpoints to cut tail latency. Work run through run_by_deadline() sees its
+request's deadline, and time_left() caps each upstream timeout by it so a
+request that has given up does not keep a worker busy. All HTTP goes
+through pooled keep-alive sessions from make_session(), so steady-state calls
+skip connection setup.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+USER_AGENT = "law_app"
+
+
+def make_session(pool_size=16, retries=1, backoff=0.5):
+    """requests.Session with a sized keep-alive pool per host and retries.
+
+    Connection errors and 502/503/504 answers are retried after a short backoff;
+    read timeouts are not, the caller's deadline rules. 429 is not retried and
+    Retry-After is ignored, since its wait can outlast the attempt and the deadline.
+    """
+    retry = Retry(
+        total=retries, connect=retries, read=0, status=retries,
+        backoff_factor=backoff, status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}), respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` calls per second with up to `burst` saved up.
+
+    acquire() reserves the next free slot and sleeps until it arrives, so
+    waiting callers are served in order and the rate is never exceeded.
+    """
+
+    def __init__(self, name, rate, burst=1):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.counters = {"acquired": 0, "waited": 0, "rejected": 0}
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting up to timeout seconds; returns False if none comes in time"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                self.counters["rejected"] += 1
+                return False
+            self.tokens -= 1
+            self.counters["acquired"] += 1
+            if wait:
+                self.counters["waited"] += 1
+
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, rate=self.rate, burst=self.burst)
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over the last `window` calls.
+
+    The breaker opens once at least `min_calls` outcomes are recorded and the
+    failure rate reaches `failure_threshold`. While open every call is refused.
+    After `reset_timeout` seconds a single half-open probe is let through: its
+    success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=0.5, window=20, min_calls=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def allow(self):
+        """Return True if a call may go out now"""
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self.probing):
+                self.probing = self.state == HALF_OPEN
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def release(self):
+        """Give back an allowed call that was never made"""
+        with self.lock:
+            self.probing = False
+
+    def record_success(self):
+        with self.lock:
+            self.counters["successes"] += 1
+            self.outcomes.append(True)
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.outcomes.clear()
+            self.probing = False
+
+    def record_failure(self, error=None):
+        with self.lock:
+            self.counters["failures"] += 1
+            self.outcomes.append(False)
+            self.last_error = str(error) if error else None
+            failures = self.outcomes.count(False)
+            if self.state == HALF_OPEN or (
+                len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_threshold
+            ):
+                if self.state != OPEN:
+                    self.counters["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def stats(self):
+        with self.lock:
+            failures = self.outcomes.count(False)
+            return dict(
+                self.counters,
+                state=self.state,
+                failure_rate=round(failures / len(self.outcomes), 3) if self.outcomes else 0.0,
+                retry_in=round(max(self.reset_timeout - (time.monotonic() - self.opened_at), 0), 1)
+                if self.state == OPEN else 0,
+                last_error=self.last_error,
+            )
+
+
+_deadline = threading.local()
+
+
+def run_by_deadline(deadline, fn, *args):
+    """Call fn(*args) with `deadline` (a time.monotonic() value) as this thread's upstream deadline"""
+    _deadline.at = deadline
+    try:
+        return fn(*args)
+    finally:
+        _deadline.at = None
+
+
+def time_left(limit, floor=0.1):
+    """Timeout for an upstream call: `limit`, cut down to what is left of this thread's deadline"""
+    at = getattr(_deadline, "at", None)
+    if at is None:
+        return limit
+    return max(min(limit, at - time.monotonic()), floor)
+
+
+def deadline_passed():
+    at = getattr(_deadline, "at", None)
+    return at is not None and time.monotonic() >= at
+
+
+class UpstreamError(Exception):
+    """Every endpoint of a hedged call failed or the deadline passed"""
+
+
+class _Cancelled(Exception):
+    pass
+
+
+RUNNING, ABANDONED, FINISHED = "running", "abandoned", "finished"
+
+
+class LatencyWindow:
+    """Latencies (seconds) of the last `size` calls to one endpoint"""
+
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct):
+        with self.lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class CallTimer:
+    """Call count, error count and latency percentiles for one upstream"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latency = LatencyWindow()
+        self.lock = threading.Lock()
+        self.counters = {"calls": 0, "errors": 0}
+
+    @contextmanager
+    def time(self):
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            with self.lock:
+                self.counters["errors"] += 1
+            raise
+        finally:
+            self.latency.add(time.monotonic() - started)
+            with self.lock:
+                self.counters["calls"] += 1
+
+    def stats(self):
+        p50, p95 = self.latency.percentile(50), self.latency.percentile(95)
+        with self.lock:
+            return dict(
+                self.counters,
+                p50_ms=round(p50 * 1000) if p50 is not None else None,
+                p95_ms=round(p95 * 1000) if p95 is not None else None,
+            )
+
+
+class HedgedPoster:
+    """POST to the fastest of several equivalent endpoints, hedging slow calls.
+
+    The endpoint with the lowest median latency is tried first. If it has not answered
+    after its own p95 (clamped to [hedge_min, hedge_max]), the next endpoint
+    is tried as well and the first good answer wins. An endpoint that fails
+    outright is replaced at once. Each attempt has its own connect and read
+    timeouts, so one stalled endpoint holds a worker for at most that long.
+    Losers are abandoned when the call returns: an attempt still queued is
+    cancelled, and one in flight has its elapsed time recorded at once so a
+    stalled server drops down the ranking as far as its samples say, without
+    pushing a fast endpoint with one slow call behind the others.
+    """
+
+    def __init__(self, name, urls, hedge_min=0.25, hedge_max=5.0, default_delay=1.0, min_samples=10, max_workers=8,
+                 session=None, connect_timeout=3.05, read_timeout=10.0):
+        self.name = name
+        self.urls = list(urls)
+        self.session = session or make_session(pool_size=max_workers)
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.latency = {url: LatencyWindow() for url in self.urls}
+        self.counters = {url: {"requests": 0, "wins": 0, "errors": 0, "cancelled": 0} for url in self.urls}
+        self.hedges = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-hedge")
+
+    def _count(self, url, counter):
+        with self.lock:
+            self.counters[url][counter] += 1
+
+    def _p95(self, url):
+        window = self.latency[url]
+        return window.percentile(95) if len(window) >= self.min_samples else None
+
+    def _ranked(self):
+        # Ranked on recorded latency only; endpoints never sampled rank as if they answered in default_delay
+        def median(url):
+            window = self.latency[url]
+            return window.percentile(50) if len(window) else self.default_delay
+        return sorted(self.urls, key=median)
+
+    def _hedge_delay(self, url):
+        p95 = self._p95(url)
+        if p95 is None:
+            return self.default_delay
+        return min(max(p95, self.hedge_min), self.hedge_max)
+
+    def _settle(self, attempt, counter=None, abandon=False):
+        """Record an attempt's latency and outcome once: when post() abandons it or when it ends"""
+        url = attempt["url"]
+        with self.lock:
+            if attempt["state"] == FINISHED:
+                return
+            first = attempt["state"] == RUNNING
+            attempt["state"] = ABANDONED if abandon else FINISHED
+            if first and counter:
+                self.counters[url][counter] += 1
+        if first:
+            self.latency[url].add(time.monotonic() - attempt["started"])
+
+    def _attempt(self, attempt, data, cancel):
+        url = attempt["url"]
+        self._count(url, "requests")
+        attempt["started"] = time.monotonic()
+        try:
+            response = self.session.post(url, data=data, timeout=attempt["timeout"], stream=True)
+            try:
+                response.raise_for_status()
+                chunks = []
+                for chunk in response.iter_content(64 * 1024):
+                    if cancel.is_set():
+                        raise _Cancelled()
+                    chunks.append(chunk)
+            finally:
+                response.close()
+        except _Cancelled:
+            self._settle(attempt, "cancelled")
+            raise
+        except Exception:
+            self._settle(attempt, "errors")
+            raise
+
+        self._settle(attempt)
+        return b"".join(chunks)
+
+    def post(self, data, timeout=30):
+        """Return the body of the first successful response"""
+        deadline = time.monotonic() + timeout
+        order = self._ranked()
+        cancel = threading.Event()
+        pending, attempts, errors = set(), {}, []
+
+        def launch(url):
+            remaining = max(deadline - time.monotonic(), 0.1)
+            attempt = {
+                "url": url, "state": RUNNING, "started": time.monotonic(),
+                "timeout": (min(self.connect_timeout, remaining), min(self.read_timeout, remaining)),
+            }
+            future = self.executor.submit(self._attempt, attempt, data, cancel)
+            attempts[future] = attempt
+            pending.add(future)
+            return url
+
+        # The hedge timer follows the most recently launched attempt
+        latest = launch(order[0])
+        tried = 1
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                can_hedge = tried < len(order)
+                wait_for = min(remaining, self._hedge_delay(latest)) if can_hedge else remaining
+                done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    url = attempts[future]["url"]
+                    try:
+                        body = future.result()
+                    except Exception as e:
+                        errors.append(f"{url}: {e}")
+                        continue
+                    self._count(url, "wins")
+                    return body
+
+                # Hedge when the timer ran out, fail over when everything in flight failed
+                if can_hedge and (not done or not pending):
+                    if not done:
+                        with self.lock:
+                            self.hedges += 1
+                    latest = launch(order[tried])
+                    tried += 1
+        finally:
+            cancel.set()
+            for future in pending:
+                if future.cancel():
+                    self._count(attempts[future]["url"], "cancelled")
+                else:
+                    self._settle(attempts[future], "cancelled", abandon=True)
+
+        raise UpstreamError("; ".join(errors) or f"no answer from {self.name} within {timeout}s")
+
+    def stats(self):
+        endpoints = {}
+        for url in self.urls:
+            window = self.latency[url]
+            p50, p95 = window.percentile(50), window.percentile(95)
+            endpoints[url] = dict(
+                self.counters[url],
+                p50_ms=round(p50 * 1000) if p50 is not None else None,
+                p95_ms=round(p95 * 1000) if p95 is not None else None,
+            )
+        return {"hedges": self.hedges, "endpoints": endpoints}
+
+
+# ── Hedging benchmark against local stub servers ──────────────────────────────
+
+def start_stub_server(delay, tail_delay=0.0, tail_rate=0.0, body=b'{"elements": []}'):
+    """Local HTTP server answering every POST after `delay` s, or `tail_delay` s for a `tail_rate` share"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(tail_delay if random.random() < tail_rate else delay)
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/interpreter"
+
+
+def benchmark_hedging(calls=200):
+    """Compare p50/p95/p99 of one endpoint with a 3% slow tail against hedging over two"""
+    random.seed(7)
+    servers = [
+        start_stub_server(0.05, tail_delay=1.5, tail_rate=0.03),
+        start_stub_server(0.08, tail_delay=1.5, tail_rate=0.03),
+    ]
+    urls = [url for _, url in servers]
+
+    def measure(poster):
+        latencies = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            poster.post(b"[out:json];", timeout=10)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        return [latencies[int(len(latencies) * pct / 100) - 1] * 1000 for pct in (50, 95, 99)]
+
+    single = measure(HedgedPoster("single", urls[:1]))
+    hedged_poster = HedgedPoster("hedged", urls, hedge_min=0.1)
+    hedged = measure(hedged_poster)
+
+    print(f"⏱️ {calls} calls, stub endpoints answer in 50/80 ms with 3% of calls stalling 1.5 s")
+    print(f"   single endpoint: p50 {single[0]:.0f} ms  p95 {single[1]:.0f} ms  p99 {single[2]:.0f} ms")
+    print(f"   hedged x2:       p50 {hedged[0]:.0f} ms  p95 {hedged[1]:.0f} ms  p99 {hedged[2]:.0f} ms"
+          f"  ({hedged_poster.hedges} hedges)")
+    for server, _ in servers:
+        server.shutdown()
+
+
+def benchmark_stall(calls=6):
+    """Sequential calls with one endpoint stalling 10 s on a two-worker pool"""
+    servers = [start_stub_server(10.0), start_stub_server(0.05)]
+    poster = HedgedPoster("stall", [url for _, url in servers], max_workers=2)
+
+    print(f"⏱️ {calls} calls, first endpoint stalls 10 s, second answers in 50 ms, 2 workers")
+    for i in range(calls):
+        started = time.perf_counter()
+        poster.post(b"[out:json];", timeout=30)
+        print(f"   call {i}: {time.perf_counter() - started:.2f}s")
+    print(f"   {poster.stats()}")
+    for server, _ in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hedged request benchmark against local stub servers")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--stall", action="store_true", help="run the stalled-endpoint scenario instead")
+    args = parser.parse_args()
+    if args.stall:
+        benchmark_stall()
+    else:
+        benchmark_hedging(args.calls)
@@ -0,0 +1,74 @@
+"""Nightly job: precompute the police station list of every district.
+
+The FIR screen's district dropdown reads these through
+/api/locations/police-stations/<district_code>, so each pick is one indexed
+read instead of a geocode plus an Overpass query. Schedule it once a night,
+e.g. with cron:
+
+    0 2 * * *  cd legal_library_db && python warm_district_stations.py
+
+Districts refreshed within --max-age-hours are skipped, so an interrupted run
+simply picks up where it stopped.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import argparse
+import logging
+import time
+
+from database import db
+from stations import refresh_district_stations
+
+def warm_district_stations(db, workers=4, max_age_hours=20):
+    db.district_stations.create_index("computed_at")
+
+    districts = list(db.districts.find({}, {"_id": 0}))
+    if not districts:
+        print("❌ No districts found. Run populate_legal_library.py first.")
+        return False
+
+    # Drop lists for districts that no longer exist
+    removed = db.district_stations.delete_many({"_id": {"$nin": [d['code'] for d in districts]}}).deleted_count
+
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    fresh = {doc["_id"] for doc in db.district_stations.find({"computed_at": {"$gte": cutoff}}, {"_id": 1})}
+    pending = [d for d in districts if d['code'] not in fresh]
+    print(f"🚔 Warming {len(pending)} of {len(districts)} districts with {workers} workers "
+          f"({len(fresh)} still fresh, {removed} removed)")
+
+    started = time.time()
+    done, failed = 0, []
+    # Upstream calls still pass through the stations module's rate limiters and
+    # circuit breakers; the pool only bounds how many districts are in flight at once
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(refresh_district_stations, d): d for d in pending}
+        for future in as_completed(futures):
+            district = futures[future]
+            try:
+                ok = future.result() is not None
+            except Exception as e:
+                print(f"❌ {district['name']}: {e}")
+                ok = False
+            if ok:
+                done += 1
+            else:
+                failed.append(district['code'])
+            if (done + len(failed)) % 50 == 0:
+                print(f"  … {done + len(failed)}/{len(pending)} ({time.time() - started:.0f}s)")
+
+    print(f"✅ Warmed {done} districts in {time.time() - started:.1f}s, {len(failed)} failed")
+    if failed:
+        print(f"⚠️ Failed (kept previous lists): {', '.join(sorted(failed))}")
+    return not failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute police station lists for every district")
+    parser.add_argument("--workers", type=int, default=4, help="districts processed concurrently")
+    parser.add_argument("--max-age-hours", type=float, default=20, help="skip lists newer than this")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if db is None:
+        print("❌ Cannot proceed without database connection.")
+    else:
+        warm_district_stations(db, workers=args.workers, max_age_hours=args.max_age_hours)